@@ -1,7 +1,10 @@
 from datetime import datetime, timedelta
+import hashlib
 import logging
-from jose import jwt
+import uuid
+from app.auth.jwt_codec import token_codec
 from app.config.config import settings
+from app.core.metrics import timed
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +16,9 @@ def create_token(data: dict, expires_delta: timedelta, token_type: str):
         "exp": now + expires_delta,
         "type": token_type
     })
-    token = jwt.encode(
-        to_encode,
-        settings.SECRET_KEY,
-        algorithm=settings.ALGORITHM
-    )
+    to_encode.setdefault("jti", uuid.uuid4().hex)
+    with timed("jwt_encode"):
+        token = token_codec.encode(to_encode)
     logger.debug(
         "Created %s token for subject=%s exp=%s",
         token_type,
@@ -26,6 +27,18 @@ def create_token(data: dict, expires_delta: timedelta, token_type: str):
     )
     return token
 
+def user_claims(user, family_id: str | None = None) -> dict:
+    claims = {
+        "sub": user.email,
+        "uid": user.id,
+        "username": user.username,
+        "ver": user.token_version or 0
+    }
+    if family_id:
+        # Lets logout end the refresh family this access token came from.
+        claims["fam"] = family_id
+    return claims
+
 def create_access_token(data: dict):
     return create_token(
         data,
@@ -39,3 +52,12 @@ def create_refresh_token(data: dict):
         timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
         "refresh"
     )
+
+def decode_token(token: str) -> dict:
+    with timed("jwt_decode"):
+        return token_codec.decode(token)
+
+def token_digest(token: str, payload: dict) -> str:
+    # Tokens issued before jti existed fall back to hashing the raw JWT.
+    key = payload.get("jti") or token
+    return hashlib.sha256(key.encode()).hexdigest()
@@ -0,0 +1,235 @@
+"""JWT encoding/decoding behind a small codec interface.
+
+``compact`` (the default) signs and verifies JWS compact tokens with PyJWT:
+HMAC, EdDSA (Ed25519) and ES256. It signs with the first key in
+``JWT_PRIVATE_KEYS`` and verifies by ``kid`` against every configured key, so
+keys can be rotated by prepending a new one and dropping the old one once its
+tokens have expired. Public halves are published at
+``/.well-known/jwks.json``. Tokens without a ``kid`` are HMAC tokens signed
+with ``SECRET_KEY``/``ALGORITHM``; with no asymmetric keys configured that is
+also what gets issued, matching the original behaviour. Once every such
+token has expired, set ``JWT_ACCEPT_LEGACY_HMAC=false`` to stop accepting
+them.
+
+``jose`` keeps the python-jose implementation. Both raise python-jose's
+``JWTError`` family, so callers catch the same exceptions either way.
+"""
+import base64
+import binascii
+import logging
+import re
+from abc import ABC, abstractmethod
+
+import jwt
+from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm
+
+from app.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+HMAC_ALGORITHMS = ("HS256", "HS384", "HS512")
+LEEWAY_SECONDS = 0
+_B64URL = re.compile(r"[A-Za-z0-9_-]*")
+
+
+def _is_canonical_segment(segment: str) -> bool:
+    # One spelling per token: unpadded base64url with zeroed trailing bits.
+    if not _B64URL.fullmatch(segment) or len(segment) % 4 == 1:
+        return False
+    try:
+        raw = base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+    except (ValueError, binascii.Error):
+        return False
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode() == segment
+
+
+class SigningKey:
+    """One key: ``alg``, optional ``kid``, and the PyJWT key material.
+
+    ``signing`` is ``None`` for verify-only keys.
+    """
+
+    def __init__(self, alg: str, kid: str | None, signing, verifying, jwk: dict | None = None):
+        self.alg = alg
+        self.kid = kid
+        self.signing = signing
+        self.verifying = verifying
+        self.jwk = jwk
+
+
+def hmac_key(secret: str, alg: str, kid: str | None = None) -> SigningKey:
+    if alg not in HMAC_ALGORITHMS:
+        raise ValueError(f"Unsupported HMAC algorithm: {alg}")
+    return SigningKey(alg, kid, secret, secret)
+
+
+def _asymmetric_key(kid: str, private, public) -> SigningKey:
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+    if isinstance(public, ed25519.Ed25519PublicKey):
+        alg = "EdDSA"
+        jwk = OKPAlgorithm.to_jwk(public, as_dict=True)
+    elif isinstance(public, ec.EllipticCurvePublicKey) and isinstance(public.curve, ec.SECP256R1):
+        alg = "ES256"
+        jwk = ECAlgorithm.to_jwk(public, as_dict=True)
+    else:
+        raise ValueError(f"JWT key {kid}: only Ed25519 and P-256 keys are supported")
+
+    jwk.update({"kid": kid, "alg": alg, "use": "sig"})
+    return SigningKey(alg, kid, private, public, jwk)
+
+
+def load_private_key(kid: str, pem: bytes) -> SigningKey:
+    from cryptography.hazmat.primitives import serialization
+
+    try:
+        private = serialization.load_pem_private_key(pem, password=None)
+    except ValueError:
+        raise ValueError(f"JWT key {kid}: JWT_PRIVATE_KEYS entries must be PEM private keys")
+    return _asymmetric_key(kid, private, private.public_key())
+
+
+def load_public_key(kid: str, pem: bytes) -> SigningKey:
+    from cryptography.hazmat.primitives import serialization
+
+    try:
+        public = serialization.load_pem_public_key(pem)
+    except ValueError:
+        raise ValueError(f"JWT key {kid}: JWT_PUBLIC_KEYS entries must be PEM public keys")
+    return _asymmetric_key(kid, None, public)
+
+
+class TokenCodec(ABC):
+    @abstractmethod
+    def encode(self, claims: dict) -> str:
+        ...
+
+    @abstractmethod
+    def decode(self, token: str) -> dict:
+        ...
+
+    def jwks(self) -> dict:
+        return {"keys": []}
+
+
+class JoseCodec(TokenCodec):
+    """python-jose with a single shared secret."""
+
+    def __init__(self, secret: str, algorithm: str):
+        from jose import jwt as jose_jwt
+
+        self._jwt = jose_jwt
+        self.secret = secret
+        self.algorithm = algorithm
+
+    def encode(self, claims: dict) -> str:
+        return self._jwt.encode(claims, self.secret, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        return self._jwt.decode(token, self.secret, algorithms=[self.algorithm])
+
+
+class CompactCodec(TokenCodec):
+    def __init__(self, signing_key: SigningKey, keys: list[SigningKey], legacy_key: SigningKey | None = None):
+        self.signing_key = signing_key
+        self.keys = {key.kid: key for key in keys if key.kid}
+        # Verifies kid-less HMAC tokens, including those issued before rotation.
+        self.legacy_key = legacy_key
+        self._headers = {"kid": signing_key.kid} if signing_key.kid else None
+
+    def encode(self, claims: dict) -> str:
+        return jwt.encode(
+            claims,
+            self.signing_key.signing,
+            algorithm=self.signing_key.alg,
+            headers=self._headers,
+        )
+
+    def decode(self, token: str) -> dict:
+        segments = token.split(".") if isinstance(token, str) else []
+        if len(segments) != 3 or not all(map(_is_canonical_segment, segments)):
+            raise JWTError("Malformed token")
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.InvalidTokenError:
+            raise JWTError("Malformed token header")
+
+        kid = header.get("kid")
+        if kid is None:
+            key = self.legacy_key
+        else:
+            key = self.keys.get(kid) if isinstance(kid, str) else None
+        if key is None:
+            raise JWTError("Unknown signing key")
+
+        # Pinning ``algorithms`` to the key's own alg means the token never
+        # picks the algorithm; PyJWT also rejects unknown ``crit`` extensions.
+        try:
+            return jwt.decode(
+                token,
+                key.verifying,
+                algorithms=[key.alg],
+                leeway=LEEWAY_SECONDS,
+                options={"verify_aud": False},
+            )
+        except jwt.ExpiredSignatureError:
+            raise ExpiredSignatureError("Signature has expired.")
+        except (jwt.ImmatureSignatureError, jwt.InvalidIssuedAtError) as exc:
+            raise JWTClaimsError(str(exc))
+        except jwt.InvalidTokenError as exc:
+            raise JWTError(str(exc))
+
+    def jwks(self) -> dict:
+        return {"keys": [key.jwk for key in self.keys.values() if key.jwk]}
+
+
+def _parse_key_files(value: str | None) -> list[tuple[str, bytes]]:
+    """Parse ``"kid1=/path/a.pem,kid2=/path/b.pem"``."""
+    entries = []
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        kid, _, path = item.partition("=")
+        if not path:
+            raise ValueError(f"JWT key entry must be kid=path: {item!r}")
+        with open(path.strip(), "rb") as handle:
+            entries.append((kid.strip(), handle.read()))
+    return entries
+
+
+def build_token_codec(backend: str) -> TokenCodec:
+    if backend == "jose":
+        return JoseCodec(settings.SECRET_KEY, settings.ALGORITHM)
+    if backend != "compact":
+        raise ValueError(f"Unknown JWT_BACKEND: {backend}")
+
+    legacy_key = None
+    if settings.SECRET_KEY and settings.ALGORITHM in HMAC_ALGORITHMS:
+        legacy_key = hmac_key(settings.SECRET_KEY, settings.ALGORITHM)
+
+    private_keys = [load_private_key(kid, pem) for kid, pem in _parse_key_files(settings.JWT_PRIVATE_KEYS)]
+    public_keys = [load_public_key(kid, pem) for kid, pem in _parse_key_files(settings.JWT_PUBLIC_KEYS)]
+    keys = private_keys + public_keys
+    if private_keys:
+        signing_key = private_keys[0]
+        if not settings.JWT_ACCEPT_LEGACY_HMAC:
+            legacy_key = None
+    elif legacy_key is not None:
+        # Still the issuing key, so it has to keep verifying.
+        signing_key = legacy_key
+    else:
+        # Nothing to sign with; fail at first use, as python-jose would.
+        return JoseCodec(settings.SECRET_KEY, settings.ALGORITHM)
+
+    logger.info(
+        "JWT codec ready alg=%s kid=%s verify_kids=%s legacy_hmac=%s",
+        signing_key.alg,
+        signing_key.kid,
+        ",".join(key.kid for key in keys) or "-",
+        legacy_key is not None,
+    )
+    return CompactCodec(signing_key, keys, legacy_key)
+
+
+token_codec = build_token_codec(settings.JWT_BACKEND)
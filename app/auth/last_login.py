@@ -0,0 +1,132 @@
+import logging
+import threading
+from datetime import datetime
+
+from sqlalchemy import bindparam, text, update
+
+from app.config.config import settings
+from app.core.scheduler import PeriodicJob
+from app.db.database import IS_POSTGRES, engine
+from app.models.auth_models import User
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """Write-behind buffer for ``users.last_login``.
+
+    Logins record ``user_id -> timestamp`` in memory (repeat logins by the
+    same user coalesce) and a periodic job writes them out in bulk. Each
+    worker keeps its own buffer; the flush only ever moves ``last_login``
+    forward, so workers flushing out of order cannot regress it. A crash
+    loses at most one interval of timestamps.
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self._pending: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.recorded = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.failures = 0
+
+    def record(self, user_id: int, timestamp: datetime) -> None:
+        with self._lock:
+            current = self._pending.get(user_id)
+            if current is None or timestamp > current:
+                self._pending[user_id] = timestamp
+            self.recorded += 1
+
+    def _requeue(self, entries: list[tuple[int, datetime]]) -> None:
+        # Put a failed batch back without overwriting newer logins.
+        with self._lock:
+            for user_id, timestamp in entries:
+                current = self._pending.get(user_id)
+                if current is None or timestamp > current:
+                    self._pending[user_id] = timestamp
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            entries = list(pending.items())
+            written = 0
+            try:
+                with engine.begin() as conn:
+                    for start in range(0, len(entries), self.batch_size):
+                        _write(conn, entries[start:start + self.batch_size])
+                        written += len(entries[start:start + self.batch_size])
+            except Exception:
+                self.failures += 1
+                self._requeue(entries)
+                raise
+            self.flushed += written
+            self.flushes += 1
+            return written
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "recorded": self.recorded,
+                "flushed": self.flushed,
+                "flushes": self.flushes,
+                "failures": self.failures,
+            }
+
+
+def _write(conn, entries: list[tuple[int, datetime]]) -> None:
+    if IS_POSTGRES:
+        rows = ", ".join(
+            f"(CAST(:id_{i} AS INTEGER), CAST(:ts_{i} AS TIMESTAMP))" for i in range(len(entries))
+        )
+        params = {}
+        for i, (user_id, timestamp) in enumerate(entries):
+            params[f"id_{i}"] = user_id
+            params[f"ts_{i}"] = timestamp
+        conn.execute(text(
+            "UPDATE users SET last_login = v.ts "
+            f"FROM (VALUES {rows}) AS v(id, ts) "
+            "WHERE users.id = v.id AND (users.last_login IS NULL OR users.last_login < v.ts)"
+        ), params)
+        return
+
+    # No UPDATE ... FROM everywhere else; one executemany in the same transaction.
+    conn.execute(
+        update(User)
+        .where(
+            User.id == bindparam("uid"),
+            (User.last_login == None) | (User.last_login < bindparam("ts"))
+        )
+        .values(last_login=bindparam("ts")),
+        [{"uid": user_id, "ts": timestamp} for user_id, timestamp in entries],
+    )
+
+
+last_login_buffer = LastLoginBuffer(batch_size=settings.LAST_LOGIN_FLUSH_BATCH_SIZE)
+
+
+def record_login(user: User) -> None:
+    """Stamp ``last_login`` now, or defer it to the buffer when write-behind is on."""
+    now = datetime.utcnow()
+    if settings.LAST_LOGIN_WRITE_BEHIND:
+        last_login_buffer.record(user.id, now)
+    else:
+        user.last_login = now
+
+
+def flush_last_logins() -> None:
+    written = last_login_buffer.flush()
+    if written:
+        logger.debug("Flushed last_login for %s users", written)
+
+
+last_login_flusher = PeriodicJob(
+    "last-login-flusher",
+    settings.LAST_LOGIN_FLUSH_INTERVAL_SECONDS,
+    flush_last_logins,
+)
@@ -0,0 +1,222 @@
+import hmac
+from abc import ABC, abstractmethod
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.config import settings
+from app.core.redis import get_redis
+from app.db.database import AsyncSessionLocal
+from app.models.auth_models import OTP
+
+logger = logging.getLogger(__name__)
+
+OTP_OK = "ok"
+OTP_NOT_FOUND = "not_found"
+OTP_EXPIRED = "expired"
+OTP_INVALID = "invalid"
+
+
+class OTPStore(ABC):
+    """Holds at most one pending OTP per email.
+
+    ``issue`` replaces any pending code. ``check`` reports whether a code
+    would be accepted without using it up, so handlers can reject bad codes
+    early. ``consume`` atomically uses the code once it matches and has not
+    expired; handlers call it after everything else that can fail, so an
+    error on our side does not burn the user's code. Both return one of
+    the ``OTP_*`` results.
+    """
+
+    @abstractmethod
+    async def issue(self, email: str, code: str, ttl_seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    async def check(self, email: str, code: str) -> str:
+        ...
+
+    @abstractmethod
+    async def consume(self, email: str, code: str, db: AsyncSession | None = None) -> str:
+        """``db``, when given, is the caller's session; stores backed by the
+        database consume inside it so the code is only spent if that
+        transaction commits."""
+
+
+def _matches(stored_code: str, code: str) -> bool:
+    return hmac.compare_digest(stored_code.encode(), code.encode())
+
+
+class MemoryOTPStore(OTPStore):
+    """Per-process store; expired codes are dropped by a coarse timing wheel.
+
+    Only suitable when every OTP request and verification for a user reaches
+    the same worker process.
+    """
+
+    def __init__(self, resolution: float = 1.0):
+        self.resolution = resolution
+        self._codes: dict[str, tuple[str, float]] = {}
+        self._wheel: dict[int, set[str]] = defaultdict(set)
+        self._cursor = int(time.time() // resolution)
+
+    def _advance(self) -> None:
+        now = time.time()
+        current = int(now // self.resolution)
+        if current - self._cursor <= len(self._wheel):
+            due = range(self._cursor, current)
+        else:
+            # Long idle gap: walk the occupied slots instead of every tick.
+            due = [slot for slot in self._wheel if slot < current]
+        for slot in due:
+            for email in self._wheel.pop(slot, ()):
+                entry = self._codes.get(email)
+                if entry and entry[1] <= now:
+                    del self._codes[email]
+        self._cursor = current
+
+    async def issue(self, email: str, code: str, ttl_seconds: float) -> None:
+        self._advance()
+        expires_at = time.time() + ttl_seconds
+        self._codes[email] = (code, expires_at)
+        self._wheel[int(expires_at // self.resolution)].add(email)
+
+    async def check(self, email: str, code: str) -> str:
+        self._advance()
+        entry = self._codes.get(email)
+        if entry is None:
+            return OTP_NOT_FOUND
+        stored_code, expires_at = entry
+        if expires_at <= time.time():
+            del self._codes[email]
+            return OTP_EXPIRED
+        if not _matches(stored_code, code):
+            return OTP_INVALID
+        return OTP_OK
+
+    async def consume(self, email: str, code: str, db: AsyncSession | None = None) -> str:
+        # No await between the check and the delete, so this is atomic on the loop.
+        result = await self.check(email, code)
+        if result == OTP_OK:
+            del self._codes[email]
+        return result
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+
+# Compare-and-delete in one server-side step: 1 consumed, 0 missing, -1 mismatch.
+REDIS_CONSUME_SCRIPT = """
+local stored = redis.call('GET', KEYS[1])
+if not stored then return 0 end
+if stored ~= ARGV[1] then return -1 end
+redis.call('DEL', KEYS[1])
+return 1
+"""
+
+
+class RedisOTPStore(OTPStore):
+    """Shared store on any Redis-protocol server; expiry is the key TTL."""
+
+    def __init__(self, client=None, prefix: str = "otp:"):
+        self._client = client
+        self.prefix = prefix
+
+    @property
+    def client(self):
+        return self._client or get_redis()
+
+    async def issue(self, email: str, code: str, ttl_seconds: float) -> None:
+        await self.client.set(self.prefix + email, code, px=int(ttl_seconds * 1000))
+
+    async def check(self, email: str, code: str) -> str:
+        stored_code = await self.client.get(self.prefix + email)
+        if stored_code is None:
+            return OTP_NOT_FOUND
+        if not _matches(stored_code, code):
+            return OTP_INVALID
+        return OTP_OK
+
+    async def consume(self, email: str, code: str, db: AsyncSession | None = None) -> str:
+        result = await self.client.eval(REDIS_CONSUME_SCRIPT, 1, self.prefix + email, code)
+        if result == 1:
+            return OTP_OK
+        return OTP_INVALID if result == -1 else OTP_NOT_FOUND
+
+
+class SqlOTPStore(OTPStore):
+    """The original ``otps`` table, kept as an optional backend."""
+
+    async def issue(self, email: str, code: str, ttl_seconds: float) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(OTP).where(
+                OTP.email == email,
+                OTP.is_used == False
+            ))
+            db.add(OTP(
+                email=email,
+                otp_code=code,
+                expires_at=datetime.utcnow() + timedelta(seconds=ttl_seconds)
+            ))
+            await db.commit()
+
+    @staticmethod
+    async def _find(email: str, code: str, db: AsyncSession, lock: bool) -> tuple[str, OTP | None]:
+        query = select(OTP).where(
+            OTP.email == email,
+            OTP.is_used == False
+        ).order_by(OTP.id.desc()).limit(1)
+        if lock:
+            query = query.with_for_update()
+        db_otp = await db.scalar(query)
+        if not db_otp:
+            return OTP_NOT_FOUND, None
+        if db_otp.expires_at < datetime.utcnow():
+            return OTP_EXPIRED, None
+        if not _matches(db_otp.otp_code, code):
+            return OTP_INVALID, None
+        return OTP_OK, db_otp
+
+    async def check(self, email: str, code: str) -> str:
+        async with AsyncSessionLocal() as db:
+            result, _ = await self._find(email, code, db, lock=False)
+            return result
+
+    async def consume(self, email: str, code: str, db: AsyncSession | None = None) -> str:
+        if db is None:
+            async with AsyncSessionLocal() as own_db:
+                result = await self.consume(email, code, own_db)
+                await own_db.commit()
+                return result
+
+        result, db_otp = await self._find(email, code, db, lock=True)
+        if result != OTP_OK:
+            return result
+        marked = (await db.execute(
+            update(OTP)
+            .where(OTP.id == db_otp.id, OTP.is_used == False)
+            .values(is_used=True)
+        )).rowcount
+        return OTP_OK if marked else OTP_NOT_FOUND
+
+
+def build_otp_store(backend: str | None) -> OTPStore:
+    backend = backend or ("redis" if settings.REDIS_URL else "sql")
+    if backend == "memory":
+        if settings.WEB_CONCURRENCY > 1:
+            # A code issued by one worker would be "not found" on the others.
+            raise ValueError("OTP_STORE=memory needs WEB_CONCURRENCY=1; use redis or sql")
+        logger.warning("OTP_STORE=memory: codes are per-process, run a single instance only")
+        return MemoryOTPStore(resolution=settings.OTP_WHEEL_RESOLUTION_SECONDS)
+    if backend == "redis":
+        return RedisOTPStore()
+    if backend == "sql":
+        return SqlOTPStore()
+    raise ValueError(f"Unknown OTP_STORE backend: {backend}")
+
+
+otp_store = build_otp_store(settings.OTP_STORE)
@@ -0,0 +1,36 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.auth_models import User
+
+
+class Principal:
+    """Authenticated caller built from access-token claims, without a DB read."""
+
+    __slots__ = ("id", "email", "username", "version")
+
+    def __init__(self, id: int, email: str, username: str | None, version: int):
+        self.id = id
+        self.email = email
+        self.username = username
+        self.version = version
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "Principal":
+        return cls(
+            id=payload["uid"],
+            email=payload["sub"],
+            username=payload.get("username"),
+            version=payload.get("ver", 0),
+        )
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            version=user.token_version or 0,
+        )
+
+    async def load_user(self, db: AsyncSession) -> User | None:
+        return await db.get(User, self.id)
@@ -0,0 +1,124 @@
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.auth.auth import create_refresh_token
+from app.config.config import settings
+from app.models.auth_models import RefreshTokenFamily, User
+
+logger = logging.getLogger(__name__)
+
+
+def _refresh_claims(user: User, family_id: str, jti: str) -> dict:
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "ver": user.token_version or 0,
+        "fam": family_id,
+        "jti": jti,
+    }
+
+
+def _expires_at() -> datetime:
+    return datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+
+def start_refresh_family(db: AsyncSession, user: User) -> tuple[str, str]:
+    """Stage a new token family on ``db``; return its id and first refresh token.
+
+    The caller commits, so the family lands in the same transaction as the
+    login that created it.
+    """
+    family_id = uuid.uuid4().hex
+    jti = uuid.uuid4().hex
+    db.add(RefreshTokenFamily(
+        id=family_id,
+        user_id=user.id,
+        current_jti=jti,
+        expires_at=_expires_at()
+    ))
+    return family_id, create_refresh_token(_refresh_claims(user, family_id, jti))
+
+
+async def revoke_refresh_family(family_id: str, db: AsyncSession) -> None:
+    await db.execute(
+        update(RefreshTokenFamily)
+        .where(RefreshTokenFamily.id == family_id)
+        .values(revoked=True)
+    )
+    await db.commit()
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+
+async def rotate_refresh_token(payload: dict, db: AsyncSession) -> tuple[User, str]:
+    """Swap a presented refresh token for a new one in the same family.
+
+    The swap is a compare-and-set on ``current_jti``, so of two requests
+    presenting the same token only one wins. Presenting a token that is no
+    longer current means it was copied: the whole family is revoked and
+    the legitimate holder has to log in again.
+    """
+    family_id = payload.get("fam")
+    jti = payload.get("jti")
+    if payload.get("type") != "refresh" or not family_id or not jti:
+        logger.warning("Refresh rejected: not a rotatable refresh token")
+        raise _unauthorized("Invalid refresh token")
+
+    new_jti = uuid.uuid4().hex
+    user_id = await db.scalar(
+        update(RefreshTokenFamily)
+        .where(
+            RefreshTokenFamily.id == family_id,
+            RefreshTokenFamily.current_jti == jti,
+            RefreshTokenFamily.revoked == False
+        )
+        .values(current_jti=new_jti, expires_at=_expires_at())
+        .returning(RefreshTokenFamily.user_id)
+    )
+
+    if user_id is None:
+        reused = (await db.execute(
+            update(RefreshTokenFamily)
+            .where(RefreshTokenFamily.id == family_id, RefreshTokenFamily.revoked == False)
+            .values(revoked=True)
+        )).rowcount
+        await db.commit()
+        if reused:
+            logger.warning("Refresh token reuse detected; revoked family=%s user_id=%s", family_id, payload.get("uid"))
+            raise _unauthorized("Refresh token reuse detected")
+        logger.warning("Refresh rejected: unknown or revoked family=%s", family_id)
+        raise _unauthorized("Invalid refresh token")
+
+    user = await db.get(User, user_id)
+    if user is None or payload.get("ver", 0) != (user.token_version or 0):
+        # Password reset since this family started; end the family too.
+        await revoke_refresh_family(family_id, db)
+        logger.warning("Refresh rejected: stale token version for family=%s", family_id)
+        raise _unauthorized("Token has been revoked")
+
+    await db.commit()
+    return user, create_refresh_token(_refresh_claims(user, family_id, new_jti))
+
+
+def prune_expired_families(db: Session, batch_size: int) -> int:
+    """Delete families whose last refresh token has expired, ``batch_size`` at a time."""
+    total = 0
+    while True:
+        expired_ids = select(RefreshTokenFamily.id).where(
+            RefreshTokenFamily.expires_at <= datetime.utcnow()
+        ).limit(batch_size)
+        deleted = db.execute(
+            delete(RefreshTokenFamily).where(RefreshTokenFamily.id.in_(expired_ids))
+        ).rowcount
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
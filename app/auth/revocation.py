@@ -0,0 +1,242 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config.config import settings
+from app.auth.refresh_tokens import prune_expired_families
+from app.core.scheduler import PeriodicJob
+from app.db.database import IS_POSTGRES, SessionLocal
+from app.models.auth_models import TokenBlacklist
+
+if IS_POSTGRES:
+    from sqlalchemy.dialects.postgresql import insert as dialect_insert
+else:
+    from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationCache:
+    """Bounded in-process view of ``token_blacklist``.
+
+    Revoked token digests are kept in an LRU map (digest -> exp). The
+    ``revocation_sync`` job refreshes it every ``refresh_seconds`` off the
+    request path, and logout adds its own digest immediately. Each sync
+    re-reads rows created since the newest ``created_at`` already seen minus
+    ``overlap_seconds``: ids and timestamps are assigned at INSERT but rows
+    only become visible at COMMIT, so a plain ``id > last_id`` watermark would
+    skip a revocation that commits after a later one.
+
+    While the cache is synced and has never evicted a live entry, a miss means
+    "not revoked" without touching the database. A token revoked on another
+    worker is therefore accepted here for up to ``refresh_seconds`` (plus any
+    commit delay beyond ``overlap_seconds``). If the last sync is older than
+    ``STALE_AFTER_SYNCS`` intervals, nothing has loaded yet, or the LRU had to
+    drop a live entry, misses fall back to the table instead, and the
+    negative answer is reused for ``negative_ttl`` seconds.
+    """
+
+    STALE_AFTER_SYNCS = 3
+
+    def __init__(self, max_size: int, refresh_seconds: float, overlap_seconds: float, negative_ttl: float):
+        self.max_size = max_size
+        self.refresh_seconds = refresh_seconds
+        self.overlap_seconds = overlap_seconds
+        self.negative_ttl = negative_ttl
+        self._digests: "OrderedDict[str, float]" = OrderedDict()
+        self._not_revoked: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._watermark: datetime | None = None
+        self._last_sync: float | None = None
+        self._complete = True
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self.refreshes = 0
+        self.evictions = 0
+
+    def _purge_expired(self) -> None:
+        now = time.time()
+        for digest in [d for d, exp in self._digests.items() if exp <= now]:
+            del self._digests[digest]
+
+    def _remember(self, digest: str, exp: float) -> None:
+        self._not_revoked.pop(digest, None)
+        self._digests[digest] = exp
+        self._digests.move_to_end(digest)
+        if len(self._digests) <= self.max_size:
+            return
+        self._purge_expired()
+        while len(self._digests) > self.max_size:
+            self._digests.popitem(last=False)
+            # A live revocation is gone, so misses can no longer be trusted.
+            self._complete = False
+            self.evictions += 1
+
+    def add(self, digest: str, exp: float) -> None:
+        with self._lock:
+            self._remember(digest, exp)
+
+    def sync(self, db: Session) -> None:
+        with self._lock:
+            watermark = self._watermark
+        query = select(
+            TokenBlacklist.token_hash, TokenBlacklist.expires_at, TokenBlacklist.created_at
+        ).where(TokenBlacklist.expires_at > datetime.utcnow())
+        if watermark is not None:
+            query = query.where(
+                TokenBlacklist.created_at >= watermark - timedelta(seconds=self.overlap_seconds)
+            )
+        rows = db.execute(query).all()
+
+        with self._lock:
+            for digest, expires_at, created_at in rows:
+                if digest not in self._digests:
+                    self._remember(digest, _to_epoch(expires_at))
+                if created_at is not None and (self._watermark is None or created_at > self._watermark):
+                    self._watermark = created_at
+            if self._watermark is None:
+                # Empty table: later rows are still newer than "now - overlap".
+                self._watermark = datetime.utcnow()
+            self._last_sync = time.monotonic()
+            self.refreshes += 1
+        if rows:
+            logger.debug("Revocation cache synced %s entries", len(rows))
+
+    def _authoritative(self) -> bool:
+        return (
+            self._complete
+            and self._last_sync is not None
+            and time.monotonic() - self._last_sync < self.refresh_seconds * self.STALE_AFTER_SYNCS
+        )
+
+    async def is_revoked(self, digest: str, exp: float, db: AsyncSession) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if digest in self._digests:
+                self._digests.move_to_end(digest)
+                self.hits += 1
+                return True
+            self.misses += 1
+            if self._authoritative():
+                return False
+            checked_until = self._not_revoked.get(digest)
+            if checked_until is not None and checked_until > now:
+                return False
+            self.fallbacks += 1
+
+        revoked = await _lookup(digest, db)
+        if revoked:
+            self.add(digest, exp)
+        elif self.negative_ttl > 0:
+            with self._lock:
+                self._not_revoked[digest] = now + self.negative_ttl
+                self._not_revoked.move_to_end(digest)
+                while len(self._not_revoked) > self.max_size:
+                    self._not_revoked.popitem(last=False)
+        return revoked
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._digests),
+                "max_size": self.max_size,
+                "authoritative": self._authoritative(),
+                "not_revoked": len(self._not_revoked),
+                "hits": self.hits,
+                "misses": self.misses,
+                "fallbacks": self.fallbacks,
+                "refreshes": self.refreshes,
+                "evictions": self.evictions,
+            }
+
+
+def _to_epoch(value: datetime) -> float:
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+
+async def _lookup(digest: str, db: AsyncSession) -> bool:
+    return await db.scalar(
+        select(TokenBlacklist.id).where(TokenBlacklist.token_hash == digest)
+    ) is not None
+
+
+revocation_cache = RevocationCache(
+    max_size=settings.REVOCATION_CACHE_SIZE,
+    refresh_seconds=settings.REVOCATION_CACHE_REFRESH_SECONDS,
+    overlap_seconds=settings.REVOCATION_SYNC_OVERLAP_SECONDS,
+    negative_ttl=settings.REVOCATION_NEGATIVE_TTL_SECONDS,
+)
+
+
+async def is_token_revoked(digest: str, exp: float, db: AsyncSession) -> bool:
+    if not settings.REVOCATION_CACHE_ENABLED:
+        return await _lookup(digest, db)
+    return await revocation_cache.is_revoked(digest, exp, db)
+
+
+async def revoke_token(digest: str, exp: float, db: AsyncSession) -> None:
+    # Concurrent logouts with the same token both succeed; the second is a no-op.
+    await db.execute(
+        dialect_insert(TokenBlacklist)
+        .values(token_hash=digest, expires_at=datetime.utcfromtimestamp(exp))
+        .on_conflict_do_nothing(index_elements=[TokenBlacklist.token_hash])
+    )
+    await db.commit()
+    revocation_cache.add(digest, exp)
+
+
+def prune_expired_tokens(db: Session, batch_size: int) -> int:
+    """Delete blacklist rows whose tokens have expired, ``batch_size`` at a time."""
+    total = 0
+    while True:
+        expired_ids = select(TokenBlacklist.id).where(
+            TokenBlacklist.expires_at <= datetime.utcnow()
+        ).limit(batch_size)
+        deleted = db.query(TokenBlacklist).filter(
+            TokenBlacklist.id.in_(expired_ids)
+        ).delete(synchronize_session=False)
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def _prune_job() -> None:
+    db = SessionLocal()
+    try:
+        deleted = prune_expired_tokens(db, settings.TOKEN_PRUNE_BATCH_SIZE)
+        families = prune_expired_families(db, settings.TOKEN_PRUNE_BATCH_SIZE)
+    finally:
+        db.close()
+    if deleted:
+        logger.info("Pruned %s expired entries from token_blacklist", deleted)
+    if families:
+        logger.info("Pruned %s expired refresh token families", families)
+
+
+def sync_revocations() -> None:
+    db = SessionLocal()
+    try:
+        revocation_cache.sync(db)
+    finally:
+        db.close()
+
+
+revocation_sync = PeriodicJob(
+    "revocation-sync",
+    settings.REVOCATION_CACHE_REFRESH_SECONDS,
+    sync_revocations,
+)
+
+token_pruner = PeriodicJob(
+    "token-blacklist-pruner",
+    settings.TOKEN_PRUNE_INTERVAL_SECONDS,
+    _prune_job,
+)
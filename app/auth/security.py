@@ -1,13 +1,167 @@
+import asyncio
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
+from app.config.config import settings
+from app.core.metrics import timed
+
+logger = logging.getLogger(__name__)
+
 pwd_context = CryptContext(
     schemes=["argon2"],
-    deprecated="auto"
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
 )
 
-def hash_password(password: str) -> str:
+
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def _verify(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def _apply(fn, items: list) -> list:
+    return [fn(item) for item in items]
+
+
+class HashingPool:
+    """Process pool for argon2 work with a hard cap on queued jobs.
+
+    When ``max_pending`` jobs are already queued or running, new work is
+    rejected with 503 instead of waiting, so a login storm cannot tie up the
+    request threadpool. ``workers == 0`` hashes inline in the caller.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                logger.info("Password hashing pool started workers=%s", self.workers)
+            return self._executor
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    def submit(self, fn, *args) -> Future:
+        executor = self._get_executor()
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                logger.warning("Password hashing pool saturated pending=%s", self.pending)
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server busy, please retry",
+                    headers={"Retry-After": "1"}
+                )
+            self.pending += 1
+        return self._submit(executor, fn, *args)
+
+    def _submit(self, executor: ProcessPoolExecutor, fn, *args) -> Future:
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def run(self, fn, *args):
+        if self.workers == 0:
+            return fn(*args)
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn, *args):
+        if self.workers == 0:
+            # No pool: still keep argon2 off the event loop.
+            return await asyncio.to_thread(fn, *args)
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def map(self, fn, items: list, batch_size: int = 8) -> list:
+        """Apply ``fn`` to every item, keeping at most ``workers`` jobs in flight.
+
+        Meant for bulk work: it waits for a free slot instead of tripping the
+        pending cap, and never queues more than one job per worker ahead of
+        interactive logins. Results come back in input order.
+        """
+        if self.workers == 0:
+            return _apply(fn, items)
+        executor = self._get_executor()
+        results: list = []
+        in_flight: deque[Future] = deque()
+        for start in range(0, len(items), batch_size):
+            if len(in_flight) >= self.workers:
+                results.extend(in_flight.popleft().result())
+            with self._lock:
+                self.pending += 1
+            in_flight.append(self._submit(executor, _apply, fn, items[start:start + batch_size]))
+        while in_flight:
+            results.extend(in_flight.popleft().result())
+        return results
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+            logger.info("Password hashing pool stopped")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self.pending,
+                "max_pending": self.max_pending,
+                "rejected": self.rejected,
+            }
+
+
+_workers = settings.HASH_WORKERS if settings.HASH_WORKERS is not None else (os.cpu_count() or 1)
+hashing_pool = HashingPool(
+    workers=_workers,
+    max_pending=settings.HASH_MAX_PENDING or _workers * 4,
+)
+
+
+def hash_password(password: str) -> str:
+    with timed("argon2_hash"):
+        return hashing_pool.run(_hash, password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    with timed("argon2_verify"):
+        return hashing_pool.run(_verify, plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    with timed("argon2_hash"):
+        return await hashing_pool.run_async(_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    with timed("argon2_verify"):
+        return await hashing_pool.run_async(_verify, plain_password, hashed_password)
+
+
+async def hash_passwords_async(passwords: list[str]) -> list[str]:
+    """Hash many passwords for bulk imports without blocking the event loop."""
+    with timed("argon2_hash_bulk"):
+        return await asyncio.to_thread(hashing_pool.map, _hash, passwords)
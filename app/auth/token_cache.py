@@ -0,0 +1,81 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from app.auth.auth import decode_token
+from app.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCache:
+    """Bounded LRU of verified bearer tokens (sha256 digest -> claims).
+
+    A hit skips signature verification and claims parsing; each token pays
+    that cost once per worker (``misses`` counts those warm-ups). Entries
+    are dropped once ``exp`` passes, so an expired token always reaches
+    ``decode_token`` and fails there. Revocation is still checked by the
+    caller on every request; ``discard`` just frees a logged-out token early.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._claims: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def decode(self, token: str) -> dict:
+        key = self._key(token)
+        with self._lock:
+            claims = self._claims.get(key)
+            if claims is not None:
+                if claims["exp"] > time.time():
+                    self._claims.move_to_end(key)
+                    self.hits += 1
+                    return dict(claims)
+                del self._claims[key]
+                self.expired += 1
+            self.misses += 1
+
+        claims = decode_token(token)
+        if "exp" in claims:
+            with self._lock:
+                self._claims[key] = claims
+                self._claims.move_to_end(key)
+                while len(self._claims) > self.max_size:
+                    self._claims.popitem(last=False)
+                    self.evictions += 1
+        return dict(claims)
+
+    def discard(self, token: str) -> None:
+        with self._lock:
+            self._claims.pop(self._key(token), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._claims),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+
+token_cache = TokenCache(max_size=settings.TOKEN_CACHE_SIZE)
+
+
+def decode_bearer_token(token: str) -> dict:
+    if not settings.TOKEN_CACHE_ENABLED:
+        return decode_token(token)
+    return token_cache.decode(token)
@@ -0,0 +1,80 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.config import settings
+from app.models.auth_models import User
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TokenVersionCache:
+    """Bounded LRU of ``users.token_version`` by user id, each entry kept ``ttl`` seconds.
+
+    Lets the claims-only principal reject tokens issued before a password
+    reset without reading the user row on every request. ``discard`` drops
+    the entry on this worker as soon as the reset commits; other workers keep
+    accepting the old tokens until their entry ages out, so the exposure
+    after a reset is at most ``ttl`` seconds instead of the token's lifetime.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._versions: "OrderedDict[int, tuple[int | None, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _cached(self, user_id: int):
+        with self._lock:
+            entry = self._versions.get(user_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self._versions.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        return _MISSING
+
+    async def current(self, user_id: int, db: AsyncSession) -> int | None:
+        """The user's token version, or ``None`` if the user no longer exists."""
+        version = self._cached(user_id)
+        if version is not _MISSING:
+            return version
+
+        # token_version is NOT NULL, so None means the row is gone.
+        version = await db.scalar(select(User.token_version).where(User.id == user_id))
+        with self._lock:
+            self._versions[user_id] = (version, time.monotonic() + self.ttl)
+            self._versions.move_to_end(user_id)
+            while len(self._versions) > self.max_size:
+                self._versions.popitem(last=False)
+                self.evictions += 1
+        return version
+
+    def discard(self, user_id: int) -> None:
+        with self._lock:
+            self._versions.pop(user_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._versions),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+token_version_cache = TokenVersionCache(
+    max_size=settings.TOKEN_VERSION_CACHE_SIZE,
+    ttl=settings.TOKEN_VERSION_CACHE_TTL_SECONDS,
+)
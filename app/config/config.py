@@ -3,22 +3,124 @@ from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"
+    LOG_ASYNC: bool = True
+    LOG_SAMPLE_RATE: float = 1.0
+    LOG_SAMPLED_LOGGERS: str = "app.main,app.routes"
+    LOG_LEVELS: str = ""
+
+    TRACE_SLOW_REQUEST_MS: float = 500.0
+    TRACE_RECENT_SLOW: int = 50
+    # Loop-wide cProfile sampling; needs TRACE_DEBUG_ENDPOINT.
+    TRACE_PROFILE_SAMPLE_RATE: float = 0.0
+    TRACE_DEBUG_ENDPOINT: bool = False
+
     POSTGRES_USER: Optional[str] = None
     POSTGRES_PASSWORD: Optional[str] = None
     POSTGRES_DB: Optional[str] = None
     DATABASE_HOST: Optional[str] = None
     DATABASE_PORT: Optional[int] = None
+    # Full SQLAlchemy URL; overrides the POSTGRES_*/DATABASE_* parts when set.
+    DATABASE_URL: Optional[str] = None
+
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: Optional[int] = None
+    DB_POOL_LOG_INTERVAL_SECONDS: float = 60.0
+
+    # Full replica URL; overrides DATABASE_REPLICA_HOST/PORT when set.
+    REPLICA_DATABASE_URL: Optional[str] = None
+    DATABASE_REPLICA_HOST: Optional[str] = None
+    DATABASE_REPLICA_PORT: Optional[int] = None
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_CHECK_INTERVAL_SECONDS: float = 10.0
 
     SECRET_KEY: Optional[str] = None
     ALGORITHM: Optional[str] = None
     ACCESS_TOKEN_EXPIRE_MINUTES: Optional[int] = None
     REFRESH_TOKEN_EXPIRE_DAYS: Optional[int] = None
     OTP_EXPIRE_MINUTES: Optional[int] = None
+    JWT_BACKEND: str = "compact"
+    # "kid=/path/key.pem,..."; the first private key signs, all keys verify.
+    JWT_PRIVATE_KEYS: Optional[str] = None
+    # Public keys still accepted for verification, e.g. after rotating away.
+    JWT_PUBLIC_KEYS: Optional[str] = None
+    # Accept kid-less SECRET_KEY tokens once asymmetric keys sign; turn off after rotation.
+    JWT_ACCEPT_LEGACY_HMAC: bool = True
+    JWKS_CACHE_MAX_AGE_SECONDS: int = 300
+    # redis | sql | memory. Unset: redis when REDIS_URL is set, else sql.
+    # memory is per-process, so only for a single instance with one worker.
+    OTP_STORE: Optional[str] = None
+    OTP_WHEEL_RESOLUTION_SECONDS: float = 1.0
+
+    REDIS_URL: Optional[str] = None
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    # Only enable behind a proxy that appends to X-Forwarded-For; the
+    # address is taken RATE_LIMIT_TRUSTED_PROXY_HOPS entries from the right.
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+    RATE_LIMIT_TRUSTED_PROXY_HOPS: int = 1
+    RATE_LIMIT_LOGIN_EMAIL: str = "5/60"
+    RATE_LIMIT_LOGIN_IP: str = "30/60"
+    RATE_LIMIT_OTP_EMAIL: str = "3/300"
+    RATE_LIMIT_OTP_IP: str = "20/300"
+    RATE_LIMIT_VERIFY_EMAIL: str = "5/300"
+    RATE_LIMIT_VERIFY_IP: str = "30/300"
+
+    # Longest a plan edited outside this process takes to reach /plans.
+    PLAN_CATALOG_TTL_SECONDS: float = 300.0
+    PLAN_CACHE_MAX_AGE_SECONDS: int = 300
+    SUBSCRIPTION_EXPIRY_INTERVAL_SECONDS: float = 60.0
+    SUBSCRIPTION_EXPIRY_BATCH_SIZE: int = 1000
     
     SMTP_EMAIL: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
     SMTP_HOST: Optional[str] = None
     SMTP_PORT: Optional[int] = None
+    SMTP_USE_TLS: bool = True
+    MAIL_QUEUE_SIZE: int = 1000
+    MAIL_BATCH_SIZE: int = 20
+    MAIL_MAX_RETRIES: int = 3
+    MAIL_RETRY_BACKOFF_SECONDS: float = 1.0
+    MAIL_IDLE_TIMEOUT_SECONDS: float = 60.0
+
+    REVOCATION_CACHE_ENABLED: bool = True
+    REVOCATION_CACHE_SIZE: int = 100_000
+    # Also the lag before another worker's logout is seen here.
+    REVOCATION_CACHE_REFRESH_SECONDS: float = 5.0
+    # Re-read window for rows that commit after later-created ones.
+    REVOCATION_SYNC_OVERLAP_SECONDS: float = 60.0
+    # Only while the cache cannot answer (stale, not loaded, overflowed): how
+    # long a "not revoked" answer from the table is reused.
+    REVOCATION_NEGATIVE_TTL_SECONDS: float = 1.0
+    TOKEN_PRUNE_INTERVAL_SECONDS: float = 3600.0
+    TOKEN_PRUNE_BATCH_SIZE: int = 1000
+    TOKEN_CACHE_ENABLED: bool = True
+    TOKEN_CACHE_SIZE: int = 10_000
+    # Longest a reset password's old access tokens stay usable on other workers.
+    TOKEN_VERSION_CACHE_TTL_SECONDS: float = 5.0
+    TOKEN_VERSION_CACHE_SIZE: int = 100_000
+    # Buffer last_login and write it in bulk; False writes it inside the login.
+    LAST_LOGIN_WRITE_BEHIND: bool = True
+    LAST_LOGIN_FLUSH_INTERVAL_SECONDS: float = 5.0
+    LAST_LOGIN_FLUSH_BATCH_SIZE: int = 1000
+
+    ARGON2_TIME_COST: int = 2
+    ARGON2_MEMORY_COST: int = 102400
+    ARGON2_PARALLELISM: int = 8
+    HASH_WORKERS: Optional[int] = None
+    # Uvicorn/Gunicorn worker processes per instance (uvicorn reads the same variable).
+    WEB_CONCURRENCY: int = 1
+    HASH_MAX_PENDING: Optional[int] = None
+
+    # Admin endpoints are mounted only when a key is configured.
+    ADMIN_API_KEY: Optional[str] = None
+    BULK_IMPORT_CHUNK_SIZE: int = 1000
 
     class Config:
         env_file = ".env"
@@ -1,21 +1,27 @@
+import hmac
 import logging
-import smtplib
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from email.mime.text import MIMEText
-from sqlalchemy.orm import Session
+from jose import JWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.auth import token_digest
+from app.auth.principal import Principal
+from app.auth.revocation import is_token_revoked
+from app.auth.token_cache import decode_bearer_token
+from app.auth.token_versions import token_version_cache
 from app.config.config import settings
+from app.core.tracing import span
 from app.db.database import get_db
-from app.models.auth_models import TokenBlacklist, User
+from app.models.auth_models import User
 from app.utils.mail_body import mail_body
+from app.utils.mailer import MailQueueFull, mail_dispatcher
 
 security = HTTPBearer()
 logger = logging.getLogger(__name__)
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security),
-        db: Session = Depends(get_db)) -> User:
+async def _authenticate(credentials: HTTPAuthorizationCredentials, db: AsyncSession) -> dict:
     if not credentials:
         logger.warning("Authorization credentials not provided")
         raise HTTPException(
@@ -23,30 +29,32 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail="Authorization credentials not provided"
         )
     token = credentials.credentials
-    blacklisted = db.query(TokenBlacklist).filter(
-        TokenBlacklist.token == token
-    ).first()
-
-    if blacklisted:
-        logger.warning("Blocked request with blacklisted token")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has been revoked"
-        )
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_bearer_token(token)
         email = payload.get("sub")
         if not email:
             logger.warning("Token payload missing subject")
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
+        if payload.get("type") == "refresh":
+            logger.warning("Refresh token presented as bearer token")
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type")
 
     except JWTError:
         logger.warning("JWT decode failed: invalid or expired token")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
-    
-    user = db.query(User).filter(User.email == email).first()
+
+    if await is_token_revoked(token_digest(token, payload), payload["exp"], db):
+        logger.warning("Blocked request with blacklisted token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+
+    return payload
+
+async def _load_user(payload: dict, db: AsyncSession) -> User:
+    email = payload["sub"]
+    user = await db.scalar(select(User).where(User.email == email))
 
     if user is None:
         logger.warning("User in token payload not found: email=%s", email)
@@ -55,31 +63,74 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail="User not found"
         )
 
+    if payload.get("ver", user.token_version or 0) != (user.token_version or 0):
+        logger.warning("Blocked request with stale token version for user_id=%s", user.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+
+    return user
+
+# Revocation and token_version checks always read the primary: a lagging
+# replica would keep accepting a token that was just revoked or reset.
+# Handlers send their own profile/subscription reads to ``get_read_db``.
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security),
+        db: AsyncSession = Depends(get_db)) -> User:
+    user = await _load_user(await _authenticate(credentials, db), db)
     logger.debug("Authenticated user_id=%s email=%s", user.id, user.email)
     return user
 
+async def get_current_principal(credentials: HTTPAuthorizationCredentials = Depends(security),
+        db: AsyncSession = Depends(get_db)) -> Principal:
+    """Identify the caller from token claims, without loading the user row.
+
+    ``ver`` is still checked against ``token_version_cache``, so tokens from
+    before a password reset are rejected (on other workers within
+    ``TOKEN_VERSION_CACHE_TTL_SECONDS``). Tokens issued before ``uid`` was
+    embedded fall back to a user lookup. Routes that need the full row
+    should depend on ``get_current_user`` or call ``Principal.load_user``.
+    """
+    payload = await _authenticate(credentials, db)
+    if "uid" in payload:
+        version = await token_version_cache.current(payload["uid"], db)
+        if version is None:
+            logger.warning("User in token payload not found: user_id=%s", payload["uid"])
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        if payload.get("ver", 0) != version:
+            logger.warning("Blocked request with stale token version for user_id=%s", payload["uid"])
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked"
+            )
+        principal = Principal.from_claims(payload)
+    else:
+        principal = Principal.from_user(await _load_user(payload, db))
+    logger.debug("Authenticated principal user_id=%s", principal.id)
+    return principal
+
+async def require_admin(x_admin_key: str | None = Header(default=None)) -> None:
+    expected = settings.ADMIN_API_KEY
+    if not expected or not x_admin_key or not hmac.compare_digest(x_admin_key.encode(), expected.encode()):
+        logger.warning("Admin request rejected: missing or invalid admin key")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin key"
+        )
+
 def send_otp_email(email: str, otp: str):
     subject = "Airthlab OTP Code"
     body = mail_body(otp)
-
-    msg = MIMEText(body)
-    msg["Subject"] = subject
-    msg["From"] = settings.SMTP_EMAIL
-    msg["To"] = email
-    logger.info("Sending OTP email to recipient=%s", email)
+    logger.info("Queueing OTP email to recipient=%s", email)
 
     try:
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-            server.login(settings.SMTP_EMAIL, settings.SMTP_PASSWORD)
-            server.sendmail(settings.SMTP_EMAIL, email, msg.as_string())
-    except Exception:
-        logger.exception("Failed to send OTP email to recipient=%s", email)
+        with span("send_otp_email"):
+            mail_dispatcher.enqueue(email, subject, body)
+    except MailQueueFull:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Failed to send OTP email"
         )
-
-    logger.info("OTP email sent to recipient=%s", email)
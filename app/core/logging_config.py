@@ -1,11 +1,69 @@
+import atexit
+import json
 import logging
-import os
+import logging.handlers
+import queue
+import random
+from datetime import datetime, timezone
 from logging.config import dictConfig
 
+from app.config.config import settings
+
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: logging.handlers.QueueHandler | None = None
+_atexit_registered = False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data)
+
+
+class SuccessSampler(logging.Filter):
+    """Keep a ``rate`` fraction of sub-WARNING records from the given loggers.
+
+    Warnings and errors always pass, as does everything from other loggers.
+    """
+
+    def __init__(self, prefixes: list[str], rate: float):
+        super().__init__()
+        self.prefixes = tuple(prefixes)
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not record.name.startswith(self.prefixes):
+            return True
+        return random.random() < self.rate
+
+
+def _split(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _level_overrides(value: str) -> dict:
+    """Parse ``"app.routes=WARNING,sqlalchemy.engine=INFO"``."""
+    loggers = {}
+    for item in _split(value):
+        name, _, level = item.partition("=")
+        loggers[name.strip()] = {"level": level.strip().upper()}
+    return loggers
+
 
 def configure_logging() -> None:
     """Configure app-wide logging format and level once at startup."""
-    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+    global _listener, _queue_handler, _atexit_registered
+    shutdown_logging()
+    log_level = settings.LOG_LEVEL.upper()
 
     dictConfig(
         {
@@ -14,18 +72,62 @@ def configure_logging() -> None:
             "formatters": {
                 "default": {
                     "format": "%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-                }
+                },
+                "json": {"()": JsonFormatter},
             },
             "handlers": {
                 "console": {
                     "class": "logging.StreamHandler",
-                    "formatter": "default",
+                    "formatter": "json" if settings.LOG_FORMAT == "json" else "default",
                 }
             },
+            "loggers": _level_overrides(settings.LOG_LEVELS),
             "root": {"handlers": ["console"], "level": log_level},
         }
     )
 
+    root = logging.getLogger()
+    console = root.handlers[0]
+    sampler = None
+    if settings.LOG_SAMPLE_RATE < 1.0:
+        sampler = SuccessSampler(_split(settings.LOG_SAMPLED_LOGGERS), settings.LOG_SAMPLE_RATE)
+
+    if not settings.LOG_ASYNC:
+        if sampler:
+            console.addFilter(sampler)
+        return
+
+    # Request threads only enqueue records; a listener thread formats and writes.
+    log_queue: queue.Queue = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    if sampler:
+        queue_handler.addFilter(sampler)
+    root.removeHandler(console)
+    root.addHandler(queue_handler)
+    _queue_handler = queue_handler
+    _listener = logging.handlers.QueueListener(log_queue, console, respect_handler_level=True)
+    _listener.start()
+    if not _atexit_registered:
+        atexit.register(shutdown_logging)
+        _atexit_registered = True
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and log directly from then on; safe to call more than once."""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    # Swap handlers before stopping so nothing lands on a queue nobody drains.
+    for handler in _listener.handlers:
+        for log_filter in _queue_handler.filters:
+            handler.addFilter(log_filter)
+        root.addHandler(handler)
+    root.removeHandler(_queue_handler)
+    _listener.stop()
+    _listener = None
+    _queue_handler = None
+
 
 def get_logger(name: str) -> logging.Logger:
     return logging.getLogger(name)
@@ -0,0 +1,216 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app.core.tracing import record_span
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    items = key + extra
+    if not items:
+        return ""
+    body = ",".join(
+        '%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in items
+    )
+    return "{%s}" % body
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return self._header() + [
+            f"{self.name}{_format_labels(key)} {value}" for key, value in values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = buckets
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # [per-bucket counts..., +Inf count, sum]
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = {key: list(series) for key, series in self._values.items()}
+        lines = self._header()
+        for key, series in values.items():
+            for i, bound in enumerate(self.buckets):
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', bound),))} {series[i]}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series[-2]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route, method and status."
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."
+)
+db_queries_per_request = Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request.",
+    buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21),
+)
+db_time_per_request = Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements per HTTP request."
+)
+db_queries_total = Counter("db_queries_total", "SQL statements executed.")
+db_query_seconds_total = Counter("db_query_seconds_total", "Time spent in SQL statements.")
+operation_seconds_total = Counter(
+    "operation_seconds_total", "Time spent in argon2, JWT and SMTP operations."
+)
+operations_total = Counter("operations_total", "Count of argon2, JWT and SMTP operations.")
+rate_limit_decisions_total = Counter(
+    "rate_limit_decisions_total", "Rate limiter decisions by rule and outcome (allowed/rejected)."
+)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+current_request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "current_request_stats", default=None
+)
+
+
+def record_query(seconds: float) -> None:
+    db_queries_total.inc()
+    db_query_seconds_total.inc(seconds)
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += seconds
+
+
+@contextmanager
+def timed(operation: str):
+    """Add the wall time of the block to ``operation_seconds_total{op=...}``.
+
+    The block is also recorded as a span on the current request trace.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        operation_seconds_total.inc(duration, op=operation)
+        operations_total.inc(op=operation)
+        record_span(operation, start, duration)
+
+
+def instrument_engine(engine) -> None:
+    """Count statements on a sync ``Engine`` (or ``AsyncEngine.sync_engine``)."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        duration = time.perf_counter() - start
+        record_query(duration)
+        record_span("db:" + statement.lstrip().split(None, 1)[0].upper(), start, duration)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("query_start") if context.connection else None
+        if starts:
+            starts.pop()
+
+
+def gauge_lines(name: str, documentation: str, samples: list[tuple[dict, float]]) -> list[str]:
+    """Render point-in-time values owned elsewhere (pools, caches) as a gauge."""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(_label_key(labels))} {float(value)}")
+    return lines
+
+
+def counter_lines(name: str, documentation: str, samples: list[tuple[dict, float]]) -> list[str]:
+    """Render running totals owned elsewhere as a counter named ``<name>_total``."""
+    name = f"{name}_total"
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} counter"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(_label_key(labels))} {float(value)}")
+    return lines
+
+
+def render_metrics(collectors=()) -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for collector in collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,164 @@
+import logging
+import time
+from collections import OrderedDict, defaultdict
+
+from fastapi import HTTPException, Request, status
+
+from app.config.config import settings
+from app.core.metrics import rate_limit_decisions_total
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rate(rate: str) -> tuple[int, float]:
+    """Parse ``"<count>/<seconds>"`` into ``(count, seconds)``."""
+    count, seconds = rate.split("/", 1)
+    return int(count), float(seconds)
+
+
+class MemoryRateLimiter:
+    """Per-process token buckets, oldest keys evicted beyond ``max_keys``."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+
+    async def hit_all(self, checks: list[tuple[str, int, float]]) -> float:
+        """Take one token from every ``(key, limit, window)`` bucket, or none.
+
+        Returns 0 when allowed, else seconds until every bucket has a token.
+        Nothing here awaits, so the check-then-take is atomic on the loop.
+        """
+        now = time.monotonic()
+        refilled = []
+        retry_after = 0.0
+        for key, limit, window in checks:
+            rate = limit / window
+            tokens, updated = self._buckets.get(key, (float(limit), now))
+            tokens = min(float(limit), tokens + (now - updated) * rate)
+            if tokens < 1:
+                retry_after = max(retry_after, (1 - tokens) / rate)
+            refilled.append((key, tokens))
+        taken = 0 if retry_after else 1
+        for key, tokens in refilled:
+            self._buckets[key] = (tokens - taken, now)
+            self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class RedisRateLimiter:
+    """Fixed-window counters shared by every worker through Redis."""
+
+    def __init__(self, client=None, prefix: str = "rl:"):
+        self._client = client
+        self.prefix = prefix
+
+    @property
+    def client(self):
+        return self._client or get_redis()
+
+    async def hit_all(self, checks: list[tuple[str, int, float]]) -> float:
+        """Count the request against every key; if any is over its limit,
+        give all the counts back so a rejected request drains nothing."""
+        now = time.time()
+        pipe = self.client.pipeline()
+        slots = []
+        for key, limit, window in checks:
+            slot = int(now // window)
+            redis_key = f"{self.prefix}{key}:{slot}"
+            slots.append((redis_key, limit, window, slot))
+            pipe.incr(redis_key)
+            pipe.expire(redis_key, int(window) + 1)
+        counts = (await pipe.execute())[::2]
+
+        retry_after = 0.0
+        for count, (_, limit, window, slot) in zip(counts, slots):
+            if count > limit:
+                retry_after = max(retry_after, (slot + 1) * window - now)
+        if retry_after:
+            refund = self.client.pipeline()
+            for redis_key, *_ in slots:
+                refund.decr(redis_key)
+            await refund.execute()
+        return retry_after
+
+
+class RateLimitRule:
+    def __init__(self, name: str, per_email: str, per_ip: str):
+        self.name = name
+        self.per_email = parse_rate(per_email)
+        self.per_ip = parse_rate(per_ip)
+
+
+RULES = {
+    "login": RateLimitRule("login", settings.RATE_LIMIT_LOGIN_EMAIL, settings.RATE_LIMIT_LOGIN_IP),
+    "otp": RateLimitRule("otp", settings.RATE_LIMIT_OTP_EMAIL, settings.RATE_LIMIT_OTP_IP),
+    "verify": RateLimitRule("verify", settings.RATE_LIMIT_VERIFY_EMAIL, settings.RATE_LIMIT_VERIFY_IP),
+}
+
+limiter = RedisRateLimiter() if settings.RATE_LIMIT_BACKEND == "redis" else MemoryRateLimiter()
+rate_limit_stats: dict[str, dict[str, int]] = defaultdict(lambda: {"allowed": 0, "rejected": 0})
+
+
+def client_ip(request: Request) -> str:
+    """Address to rate-limit by.
+
+    Each trusted proxy appends the peer it saw to X-Forwarded-For, so only
+    the right-most ``RATE_LIMIT_TRUSTED_PROXY_HOPS`` entries are ours;
+    anything further left was sent by the client and can be forged.
+    """
+    if settings.RATE_LIMIT_TRUST_FORWARDED and settings.RATE_LIMIT_TRUSTED_PROXY_HOPS > 0:
+        hops = [
+            hop.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for hop in header.split(",")
+            if hop.strip()
+        ]
+        if hops:
+            return hops[max(len(hops) - settings.RATE_LIMIT_TRUSTED_PROXY_HOPS, 0)]
+    return request.client.host if request.client else "unknown"
+
+
+async def _request_email(request: Request) -> str | None:
+    try:
+        body = await request.json()
+    except Exception:
+        return None
+    email = body.get("email") if isinstance(body, dict) else None
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+def rate_limit(rule_name: str):
+    """Dependency that throttles a route by client IP and request-body email.
+
+    Runs before the handler's own work, so rejected calls cost no database
+    query or password hash.
+    """
+    rule = RULES[rule_name]
+
+    async def dependency(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        checks = [(f"{rule.name}:ip:{client_ip(request)}", *rule.per_ip)]
+        email = await _request_email(request)
+        if email:
+            checks.append((f"{rule.name}:email:{email}", *rule.per_email))
+
+        # Both limits are checked before either is charged.
+        retry_after = await limiter.hit_all(checks)
+        if retry_after:
+            rate_limit_stats[rule.name]["rejected"] += 1
+            rate_limit_decisions_total.inc(rule=rule.name, outcome="rejected")
+            logger.warning("Rate limit exceeded rule=%s keys=%s", rule.name, ",".join(key for key, *_ in checks))
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please retry later",
+                headers={"Retry-After": str(max(1, int(retry_after + 0.999)))}
+            )
+        rate_limit_stats[rule.name]["allowed"] += 1
+        rate_limit_decisions_total.inc(rule=rule.name, outcome="allowed")
+
+    return dependency
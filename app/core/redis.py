@@ -0,0 +1,29 @@
+import logging
+
+from app.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+
+def get_redis():
+    """Shared ``redis.asyncio`` client built from ``REDIS_URL``.
+
+    ``redis`` is only required when a Redis-backed store is configured.
+    """
+    global _client
+    if _client is None:
+        if not settings.REDIS_URL:
+            raise RuntimeError("REDIS_URL must be set to use a Redis-backed store")
+        import redis.asyncio as redis
+
+        _client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        logger.info("Redis client initialized")
+    return _client
+
+
+def set_redis(client) -> None:
+    """Install a client explicitly, e.g. a fakeredis instance in local runs."""
+    global _client
+    _client = client
@@ -0,0 +1,127 @@
+import cProfile
+import io
+import logging
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Trace:
+    """Spans recorded while serving one request."""
+
+    __slots__ = ("method", "path", "start", "spans")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.start = time.perf_counter()
+        self.spans: list[tuple[str, float, float]] = []
+
+    def add(self, name: str, start: float, duration: float) -> None:
+        self.spans.append((name, start - self.start, duration))
+
+    def breakdown(self) -> list[dict]:
+        totals: dict[str, list] = {}
+        for name, _, duration in self.spans:
+            entry = totals.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += duration
+        return sorted(
+            (
+                {"span": name, "count": count, "total_ms": round(total * 1000, 3)}
+                for name, (count, total) in totals.items()
+            ),
+            key=lambda item: item["total_ms"],
+            reverse=True,
+        )
+
+
+current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+slow_requests: deque = deque(maxlen=settings.TRACE_RECENT_SLOW)
+
+_profile_lock = threading.Lock()
+
+
+def record_span(name: str, start: float, duration: float) -> None:
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(name, start, duration)
+
+
+@contextmanager
+def span(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, start, time.perf_counter() - start)
+
+
+LOOP_PROFILE_NOTE = (
+    "Loop-wide profile: covers every task that ran on the event loop while this "
+    "request was in flight, not just this request."
+)
+
+
+def start_profile() -> cProfile.Profile | None:
+    """Start a sampled profile unless another request already holds the profiler.
+
+    cProfile hooks the event-loop thread, so the result covers every request
+    interleaved on the loop during the window, not only the sampled one. It
+    is only collected when the debug endpoint is enabled.
+    """
+    if not settings.TRACE_DEBUG_ENDPOINT:
+        return None
+    if settings.TRACE_PROFILE_SAMPLE_RATE <= 0 or random.random() >= settings.TRACE_PROFILE_SAMPLE_RATE:
+        return None
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def stop_profile(profiler: cProfile.Profile) -> str:
+    profiler.disable()
+    _profile_lock.release()
+    out = io.StringIO()
+    out.write(LOOP_PROFILE_NOTE + "\n")
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(25)
+    return out.getvalue()
+
+
+def finish_trace(trace: Trace, elapsed: float, status_code: int, loop_profile: str | None = None) -> None:
+    elapsed_ms = elapsed * 1000
+    if elapsed_ms < settings.TRACE_SLOW_REQUEST_MS:
+        return
+    breakdown = trace.breakdown()
+    accounted = sum(item["total_ms"] for item in breakdown)
+    entry = {
+        "method": trace.method,
+        "path": trace.path,
+        "status": status_code,
+        "elapsed_ms": round(elapsed_ms, 3),
+        "unaccounted_ms": round(max(elapsed_ms - accounted, 0.0), 3),
+        "spans": breakdown,
+    }
+    if loop_profile:
+        entry["loop_profile"] = loop_profile
+    slow_requests.append(entry)
+    logger.warning(
+        "Slow request %s %s -> %s (%.2fms) spans=%s",
+        trace.method,
+        trace.path,
+        status_code,
+        elapsed_ms,
+        ", ".join(f"{s['span']} x{s['count']} {s['total_ms']}ms" for s in breakdown),
+    )
+    if loop_profile:
+        logger.warning("Loop profile during slow request %s %s\n%s", trace.method, trace.path, loop_profile)
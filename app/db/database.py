@@ -1,36 +1,136 @@
 import logging
+from fastapi import Depends
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config.config import settings
+from app.core.metrics import instrument_engine
+from app.db.pool import (
+    AsyncPool,
+    ReplicaPool,
+    SyncPool,
+    async_pool_metrics,
+    replica_pool_metrics,
+    sync_pool_metrics,
+)
+from app.db.replica import ReplicaRouter
 
 logger = logging.getLogger(__name__)
 
-DATABASE_URL = (
+DATABASE_URL = settings.DATABASE_URL or (
     f"postgresql://{settings.POSTGRES_USER}:"
     f"{settings.POSTGRES_PASSWORD}@"
     f"{settings.DATABASE_HOST}:"
     f"{settings.DATABASE_PORT}/"
     f"{settings.POSTGRES_DB}"
 )
+IS_POSTGRES = DATABASE_URL.startswith("postgresql")
+ASYNC_DATABASE_URL = (
+    DATABASE_URL
+    .replace("postgresql://", "postgresql+asyncpg://", 1)
+    .replace("sqlite://", "sqlite+aiosqlite://", 1)
+)
+# An explicit REPLICA_DATABASE_URL wins; otherwise the replica shares the
+# primary's POSTGRES_* credentials on DATABASE_REPLICA_HOST.
+REPLICA_DATABASE_URL = settings.REPLICA_DATABASE_URL.replace(
+    "postgresql://", "postgresql+asyncpg://", 1
+) if settings.REPLICA_DATABASE_URL else (
+    f"postgresql+asyncpg://{settings.POSTGRES_USER}:"
+    f"{settings.POSTGRES_PASSWORD}@"
+    f"{settings.DATABASE_REPLICA_HOST}:"
+    f"{settings.DATABASE_REPLICA_PORT or settings.DATABASE_PORT}/"
+    f"{settings.POSTGRES_DB}"
+) if settings.DATABASE_REPLICA_HOST else None
+
+POOL_OPTIONS = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+sync_connect_args = {}
+async_connect_args = {}
+if settings.DB_STATEMENT_TIMEOUT_MS and IS_POSTGRES:
+    sync_connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    async_connect_args["server_settings"] = {
+        "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)
+    }
 
 try:
-    engine = create_engine(DATABASE_URL)
-    logger.info("Database engine initialized")
+    # The sync engine is kept for startup DDL/seeding and background jobs;
+    # request handlers use the async engine.
+    engine = create_engine(
+        DATABASE_URL,
+        poolclass=SyncPool,
+        connect_args=sync_connect_args,
+        **POOL_OPTIONS
+    )
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        poolclass=AsyncPool,
+        connect_args=async_connect_args,
+        **POOL_OPTIONS
+    )
+    sync_pool_metrics.pool = engine.pool
+    async_pool_metrics.pool = async_engine.pool
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+
+    replica_engine = None
+    if REPLICA_DATABASE_URL:
+        replica_engine = create_async_engine(
+            REPLICA_DATABASE_URL,
+            poolclass=ReplicaPool,
+            connect_args=async_connect_args,
+            **POOL_OPTIONS
+        )
+        replica_pool_metrics.pool = replica_engine.pool
+        instrument_engine(replica_engine.sync_engine)
+    logger.info("Database engines initialized")
 except Exception:
     logger.exception("Failed to initialize database engine")
     raise
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+replica_router = ReplicaRouter(
+    replica_engine,
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_CHECK_INTERVAL_SECONDS,
+)
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            logger.exception("Database session error; rolled back transaction")
+            raise
+
+
+async def get_read_db(db: AsyncSession = Depends(get_db)):
+    """Session for read-only handlers: the replica when healthy, else the primary.
+
+    Falling back reuses the request's primary session, so a handler that also
+    depends on ``get_db`` does not hold two primary connections.
+    """
+    if not await replica_router.available():
+        replica_router.reads_primary += 1
         yield db
-    except Exception:
-        db.rollback()
-        logger.exception("Database session error; rolled back transaction")
-        raise
-    finally:
-        db.close()
+        return
+
+    replica_router.reads_replica += 1
+    async with replica_router.sessionmaker() as read_db:
+        try:
+            yield read_db
+        except Exception as exc:
+            replica_router.mark_failed(exc)
+            await read_db.rollback()
+            raise
@@ -0,0 +1,91 @@
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant shared by every worker so only one of them migrates.
+MIGRATION_LOCK_KEY = 7_310_001
+
+# Legacy blacklist rows carry no exp; assume the longest token lifetime.
+LEGACY_TOKEN_DAYS = int(settings.REFRESH_TOKEN_EXPIRE_DAYS or 30)
+
+# Ordered, append-only. Each step must be safe on a database freshly built by
+# ``Base.metadata.create_all`` as well as on one created by older releases.
+MIGRATIONS = [
+    (1, "token_blacklist_digest", [
+        "ALTER TABLE token_blacklist ADD COLUMN IF NOT EXISTS token_hash VARCHAR(64)",
+        "ALTER TABLE token_blacklist ADD COLUMN IF NOT EXISTS expires_at TIMESTAMP WITHOUT TIME ZONE",
+        f"""
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'token_blacklist' AND column_name = 'token'
+            ) THEN
+                UPDATE token_blacklist
+                SET token_hash = encode(sha256(convert_to(token, 'UTF8')), 'hex'),
+                    expires_at = COALESCE(created_at, now())
+                        + make_interval(days => {LEGACY_TOKEN_DAYS})
+                WHERE token_hash IS NULL;
+                DELETE FROM token_blacklist a USING token_blacklist b
+                WHERE a.token_hash = b.token_hash AND a.id > b.id;
+                ALTER TABLE token_blacklist DROP COLUMN token;
+            END IF;
+        END $$
+        """,
+        "ALTER TABLE token_blacklist ALTER COLUMN token_hash SET NOT NULL",
+        "ALTER TABLE token_blacklist ALTER COLUMN expires_at SET NOT NULL",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_token_blacklist_token_hash ON token_blacklist (token_hash)",
+        "CREATE INDEX IF NOT EXISTS ix_token_blacklist_expires_at ON token_blacklist (expires_at)",
+    ]),
+    (2, "users_token_version", [
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0",
+    ]),
+    (3, "subscription_and_otp_indexes", [
+        # Keep only the newest active row per user before enforcing uniqueness.
+        """
+        UPDATE user_subscriptions SET status = 'expired'
+        WHERE status = 'active' AND id NOT IN (
+            SELECT max(id) FROM user_subscriptions
+            WHERE status = 'active' GROUP BY user_id
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_user_subscriptions_user_id_status "
+        "ON user_subscriptions (user_id, status)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_user_subscriptions_active_user "
+        "ON user_subscriptions (user_id) WHERE status = 'active'",
+        "CREATE INDEX IF NOT EXISTS ix_otps_email_is_used_id "
+        "ON otps (email, is_used, id DESC)",
+    ]),
+    (4, "token_blacklist_created_at_index", [
+        "CREATE INDEX IF NOT EXISTS ix_token_blacklist_created_at ON token_blacklist (created_at)",
+    ]),
+]
+
+
+def run_migrations(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, "
+            "name VARCHAR NOT NULL, "
+            "applied_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now())"
+        ))
+        applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+        for version, name, statements in MIGRATIONS:
+            if version in applied:
+                continue
+            logger.info("Applying migration %s_%s", version, name)
+            for statement in statements:
+                conn.execute(text(statement))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                {"version": version, "name": name},
+            )
+    logger.info("Database schema up to date version=%s", MIGRATIONS[-1][0])
@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """Checkout wait times and overflow/timeout counts for one pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.overflow_events = 0
+        self.timeouts = 0
+
+    def observe(self, wait_ms: float, overflowed: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total_ms += wait_ms
+            if wait_ms > self.wait_max_ms:
+                self.wait_max_ms = wait_ms
+            if overflowed:
+                self.overflow_events += 1
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "wait_avg_ms": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 3),
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+            }
+        if self.pool is not None:
+            data.update({
+                "size": self.pool.size(),
+                "in_use": self.pool.checkedout(),
+                "idle": self.pool.checkedin(),
+                "overflow": max(self.pool.overflow(), 0),
+            })
+        return data
+
+
+class _InstrumentedPoolMixin:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        overflow_before = self.overflow()
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.observe_timeout()
+            logger.warning("Connection pool %s checkout timed out", self.metrics.name)
+            raise
+        wait_ms = (time.perf_counter() - start) * 1000
+        self.metrics.observe(wait_ms, self.overflow() > max(overflow_before, 0))
+        return conn
+
+
+def instrumented_pool(base: type, metrics: PoolMetrics) -> type:
+    return type(
+        f"Instrumented{base.__name__}",
+        (_InstrumentedPoolMixin, base),
+        {"metrics": metrics},
+    )
+
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+replica_pool_metrics = PoolMetrics("replica")
+
+SyncPool = instrumented_pool(QueuePool, sync_pool_metrics)
+AsyncPool = instrumented_pool(AsyncAdaptedQueuePool, async_pool_metrics)
+ReplicaPool = instrumented_pool(AsyncAdaptedQueuePool, replica_pool_metrics)
+
+
+def pool_stats() -> dict:
+    return {
+        metrics.name: metrics.stats()
+        for metrics in (sync_pool_metrics, async_pool_metrics, replica_pool_metrics)
+        if metrics.pool is not None
+    }
+
+
+def log_pool_stats() -> None:
+    for name, data in pool_stats().items():
+        logger.info(
+            "DB pool %s in_use=%s idle=%s overflow=%s wait_avg_ms=%s wait_max_ms=%s overflow_events=%s timeouts=%s",
+            name,
+            data.get("in_use"),
+            data.get("idle"),
+            data.get("overflow"),
+            data["wait_avg_ms"],
+            data["wait_max_ms"],
+            data["overflow_events"],
+            data["timeouts"],
+        )
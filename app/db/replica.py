@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+LAG_QUERY = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "END"
+)
+
+
+class ReplicaRouter:
+    """Tracks whether the read replica is reachable and fresh enough to use.
+
+    The health check runs lazily from the request path at most once per
+    ``check_interval`` seconds; connection errors seen by request sessions
+    mark the replica down until the next check.
+    """
+
+    def __init__(self, engine: AsyncEngine | None, max_lag: float, check_interval: float):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sessionmaker = (
+            async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+            if engine is not None else None
+        )
+        self.healthy = engine is not None
+        self.lag_seconds = 0.0
+        self._last_check = 0.0
+        self._lock = asyncio.Lock()
+        self.reads_replica = 0
+        self.reads_primary = 0
+
+    @property
+    def configured(self) -> bool:
+        return self.engine is not None
+
+    async def _check(self) -> None:
+        try:
+            async with self.engine.connect() as conn:
+                lag = float(await conn.scalar(LAG_QUERY))
+        except Exception:
+            if self.healthy:
+                logger.exception("Read replica health check failed; routing reads to primary")
+            self.healthy = False
+            return
+        self.lag_seconds = lag
+        was_healthy = self.healthy
+        self.healthy = lag <= self.max_lag
+        if self.healthy and not was_healthy:
+            logger.info("Read replica healthy again lag=%.2fs", lag)
+        elif not self.healthy and was_healthy:
+            logger.warning("Read replica lagging lag=%.2fs; routing reads to primary", lag)
+
+    async def available(self) -> bool:
+        if not self.configured:
+            return False
+        if time.monotonic() - self._last_check >= self.check_interval:
+            async with self._lock:
+                if time.monotonic() - self._last_check >= self.check_interval:
+                    await self._check()
+                    self._last_check = time.monotonic()
+        return self.healthy
+
+    def mark_failed(self, exc: Exception) -> None:
+        if isinstance(exc, (OperationalError, DBAPIError)) and self.healthy:
+            logger.warning("Read replica error; routing reads to primary until next check")
+            self.healthy = False
+
+    def stats(self) -> dict:
+        return {
+            "configured": self.configured,
+            "healthy": self.healthy,
+            "lag_seconds": round(self.lag_seconds, 3),
+            "reads_replica": self.reads_replica,
+            "reads_primary": self.reads_primary,
+        }
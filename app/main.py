@@ -1,28 +1,67 @@
 import time
 from fastapi import FastAPI, Request
-from app.core.logging_config import configure_logging, get_logger
+from app.core.logging_config import configure_logging, get_logger, shutdown_logging
 from app.routes.auth_route import router as auth_router
 from app.routes.subscription_route import router as subscription_router
 from app.routes.health_route import router as health_router
+from app.routes.metrics_route import router as metrics_router
+from app.routes.debug_route import router as debug_router
+from app.routes.admin_route import router as admin_router
+from app.routes.well_known_route import router as well_known_router
+from app.auth.last_login import flush_last_logins, last_login_flusher
+from app.auth.revocation import revocation_sync, sync_revocations, token_pruner
+from app.auth.security import hashing_pool
+from app.core.metrics import (
+    RequestStats,
+    current_request_stats,
+    db_queries_per_request,
+    db_time_per_request,
+    http_request_duration,
+    http_requests_in_flight,
+)
+from app.core.scheduler import PeriodicJob
+from app.core.tracing import Trace, current_trace, finish_trace, start_profile, stop_profile
 from app.db.database import engine, Base, SessionLocal
-from app.config.settings import settings
-from app.utils.seed import seed_subscription_plans
+from app.db.migrations import run_migrations
+from app.db.pool import log_pool_stats
+from app.utils.mailer import mail_dispatcher
+from app.utils.plan_catalog import plan_catalog
+from app.utils.subscription_expiry import subscription_expirer
+from app.config.config import settings
+from app.utils.subs_plan_seed import seed_subscription_plans
 
 configure_logging()
 logger = get_logger(__name__)
 
 app = FastAPI(title="Authentication API")
+pool_stats_logger = PeriodicJob(
+    "db-pool-stats", settings.DB_POOL_LOG_INTERVAL_SECONDS, log_pool_stats
+)
 
 app.include_router(auth_router)
 app.include_router(subscription_router)
 app.include_router(health_router)
+app.include_router(metrics_router)
+app.include_router(well_known_router)
+if settings.TRACE_DEBUG_ENDPOINT:
+    app.include_router(debug_router)
+if settings.ADMIN_API_KEY:
+    app.include_router(admin_router)
 
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     start_time = time.perf_counter()
+    stats = RequestStats()
+    stats_token = current_request_stats.set(stats)
+    trace = Trace(request.method, request.url.path)
+    trace_token = current_trace.set(trace)
+    profiler = start_profile()
+    http_requests_in_flight.inc()
+    status_code = 500
     try:
         response = await call_next(request)
+        status_code = response.status_code
     except Exception:
         elapsed_ms = (time.perf_counter() - start_time) * 1000
         logger.exception(
@@ -32,8 +71,23 @@ async def log_requests(request: Request, call_next):
             elapsed_ms,
         )
         raise
+    finally:
+        elapsed = time.perf_counter() - start_time
+        http_requests_in_flight.dec()
+        current_request_stats.reset(stats_token)
+        current_trace.reset(trace_token)
+        loop_profile = stop_profile(profiler) if profiler else None
+        finish_trace(trace, elapsed, status_code, loop_profile)
+        # Label by route template, not raw path, to keep cardinality bounded.
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        http_request_duration.observe(
+            elapsed, route=path, method=request.method, status=status_code
+        )
+        db_queries_per_request.observe(stats.queries, route=path)
+        db_time_per_request.observe(stats.db_seconds, route=path)
 
-    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    elapsed_ms = elapsed * 1000
     logger.info(
         "HTTP %s %s -> %s (%.2fms)",
         request.method,
@@ -54,13 +108,43 @@ def startup_event():
         settings.DATABASE_HOST,
         settings.DATABASE_PORT,
     ]
-    if any(v in (None, "") for v in required):
+    if not settings.DATABASE_URL and any(v in (None, "") for v in required):
         logger.warning("Database env not fully configured; skipping DB init on startup.")
         return
 
     Base.metadata.create_all(bind=engine)
+    if engine.dialect.name == "postgresql":
+        run_migrations(engine)
     db = SessionLocal()
     try:
         seed_subscription_plans(db)
+        plan_catalog.load(db)
     finally:
         db.close()
+
+    token_pruner.start()
+    if settings.REVOCATION_CACHE_ENABLED:
+        sync_revocations()
+        revocation_sync.start()
+    if settings.LAST_LOGIN_WRITE_BEHIND:
+        last_login_flusher.start()
+    if settings.SUBSCRIPTION_EXPIRY_INTERVAL_SECONDS > 0:
+        subscription_expirer.start()
+    if settings.DB_POOL_LOG_INTERVAL_SECONDS > 0:
+        pool_stats_logger.start()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    token_pruner.stop()
+    revocation_sync.stop()
+    last_login_flusher.stop()
+    try:
+        flush_last_logins()
+    except Exception:
+        logger.exception("Final last_login flush failed")
+    subscription_expirer.stop()
+    pool_stats_logger.stop()
+    mail_dispatcher.stop()
+    hashing_pool.shutdown()
+    shutdown_logging()
@@ -0,0 +1,27 @@
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from app.config.config import settings
+from app.config.deps import require_admin
+from app.schemas.admin_schema import BulkImportReport
+from app.utils.bulk_import import FORMATS, import_lines, iter_lines
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+logger = logging.getLogger(__name__)
+
+@router.post("/users/import", response_model=BulkImportReport)
+async def import_users(
+    request: Request,
+    format: str | None = None,
+    chunk_size: int = settings.BULK_IMPORT_CHUNK_SIZE,
+):
+    """Stream NDJSON (default) or CSV rows; see ``app.utils.bulk_import``."""
+    content_type = request.headers.get("content-type", "")
+    fmt = format or ("csv" if "csv" in content_type else "ndjson")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format, expected one of {', '.join(FORMATS)}")
+    if not 1 <= chunk_size <= 10_000:
+        raise HTTPException(status_code=400, detail="chunk_size must be between 1 and 10000")
+
+    logger.info("Bulk user import started format=%s chunk_size=%s", fmt, chunk_size)
+    return await import_lines(iter_lines(request.stream()), fmt, chunk_size)
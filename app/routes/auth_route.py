@@ -3,21 +3,58 @@ import logging
 from app.models import auth_models
 from app.schemas import auth_schema
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.auth import auth
-from app.db.database import get_db
-from app.config.deps import get_current_user, send_otp_email
+from app.auth.otp_store import OTP_EXPIRED, OTP_INVALID, OTP_NOT_FOUND, OTP_OK, otp_store
+from app.auth.last_login import record_login
+from app.auth.refresh_tokens import revoke_refresh_family, rotate_refresh_token, start_refresh_family
+from app.auth.revocation import revoke_token
+from app.auth.token_cache import token_cache
+from app.auth.token_versions import token_version_cache
+from app.auth.principal import Principal
+from app.db.database import get_db, get_read_db
+from app.config.deps import get_current_principal, send_otp_email
 from app.config.config import settings
-from app.auth.security import hash_password, verify_password
+from app.core.rate_limit import rate_limit
+from app.auth.security import hash_password_async, verify_password_async
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import JWTError
 
 security = HTTPBearer()
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 logger = logging.getLogger(__name__)
 
+OTP_ERRORS = {
+    OTP_NOT_FOUND: "OTP not found",
+    OTP_EXPIRED: "OTP expired",
+    OTP_INVALID: "Invalid OTP",
+}
+
+def _reject_otp(email: str, result: str, action: str) -> None:
+    if result != OTP_OK:
+        detail = OTP_ERRORS[result]
+        logger.warning("%s failed for email=%s: %s", action, email, detail)
+        raise HTTPException(status_code=400, detail=detail)
+
+async def _check_otp(email: str, otp: str, action: str) -> None:
+    _reject_otp(email, await otp_store.check(email, otp), action)
+
+async def _consume_otp(email: str, otp: str, action: str, db: AsyncSession) -> None:
+    # Last step before commit: anything failing earlier leaves the code usable.
+    _reject_otp(email, await otp_store.consume(email, otp, db), action)
+
+def _check_available(payload: auth_schema.Register, taken: list) -> None:
+    if any(email == payload.email for email, _ in taken):
+        logger.warning("Register rejected for email=%s: email already registered", payload.email)
+        raise HTTPException(status_code=400, detail="Email already registered")
+    if taken:
+        logger.warning("Register rejected for username=%s: username already taken", payload.username)
+        raise HTTPException(status_code=400, detail="Username already taken")
+
 @router.post("/register", response_model=auth_schema.UserResponse, status_code=201)
-def register(payload: auth_schema.Register, db: Session = Depends(get_db)):
+async def register(payload: auth_schema.Register, db: AsyncSession = Depends(get_db)):
     logger.info("Register requested for email=%s username=%s", payload.email, payload.username)
 
     if len(payload.password) < 8:
@@ -27,43 +64,55 @@ def register(payload: auth_schema.Register, db: Session = Depends(get_db)):
             detail="Password must be at least 8 characters"
         )
 
-    existing_email = db.query(auth_models.User).filter(
-        auth_models.User.email == payload.email
-    ).first()
-
-    if existing_email:
-        logger.warning("Register rejected for email=%s: email already registered", payload.email)
-        raise HTTPException(status_code=400, detail="Email already registered")
-
-    existing_username = db.query(auth_models.User).filter(
-        auth_models.User.username == payload.username
-    ).first()
+    # One indexed lookup for both unique fields, before paying for argon2.
+    taken = (await db.execute(
+        select(auth_models.User.email, auth_models.User.username).where(or_(
+            auth_models.User.email == payload.email,
+            auth_models.User.username == payload.username
+        )).limit(2)
+    )).all()
+    _check_available(payload, taken)
+
+    hashed = await hash_password_async(payload.password)
+    try:
+        # The unique indexes decide races between concurrent registrations.
+        user = (await db.execute(
+            insert(auth_models.User)
+            .values(
+                email=payload.email,
+                username=payload.username,
+                password=hashed,
+                is_verified=True
+            )
+            .returning(auth_models.User.id, auth_models.User.created_at)
+        )).one()
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        message = str(exc.orig)
+        # Postgres names the index, SQLite the column.
+        if "ix_users_username" in message or "users.username" in message:
+            detail = "Username already taken"
+        else:
+            detail = "Email already registered"
+        logger.warning("Register rejected for email=%s: %s (concurrent insert)", payload.email, detail)
+        raise HTTPException(status_code=400, detail=detail)
+    logger.info("User registered successfully user_id=%s email=%s", user.id, payload.email)
 
-    if existing_username:
-        logger.warning("Register rejected for username=%s: username already taken", payload.username)
-        raise HTTPException(status_code=400, detail="Username already taken")
-
-    user = auth_models.User(
-        email=payload.email,
-        username=payload.username,
-        password=hash_password(payload.password),
-        is_verified=True
-    )
-
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    logger.info("User registered successfully user_id=%s email=%s", user.id, user.email)
-
-    return user
+    return {
+        "email": payload.email,
+        "username": payload.username,
+        "created_at": user.created_at,
+        "last_login": None
+    }
 
-@router.post("/login", response_model=auth_schema.Token)
-def login(payload: auth_schema.Login, db: Session = Depends(get_db)):
+@router.post("/login", response_model=auth_schema.Token, dependencies=[Depends(rate_limit("login"))])
+async def login(payload: auth_schema.Login, db: AsyncSession = Depends(get_db)):
     logger.info("Login requested for email=%s", payload.email)
 
-    user = db.query(auth_models.User).filter(
+    user = await db.scalar(select(auth_models.User).where(
         auth_models.User.email == payload.email
-    ).first()
+    ))
 
     if not user or not user.password:
         logger.warning("Login failed for email=%s: user not found or password missing", payload.email)
@@ -72,7 +121,7 @@ def login(payload: auth_schema.Login, db: Session = Depends(get_db)):
             detail="Invalid credentials"
         )
 
-    if not verify_password(payload.password, user.password):
+    if not await verify_password_async(payload.password, user.password):
         logger.warning("Login failed for email=%s: invalid credentials", payload.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -86,11 +135,11 @@ def login(payload: auth_schema.Login, db: Session = Depends(get_db)):
             detail="Account not verified"
         )
 
-    user.last_login = datetime.utcnow()
-    db.commit()
+    record_login(user)
+    family_id, refresh_token = start_refresh_family(db, user)
+    await db.commit()
 
-    access_token = auth.create_access_token({"sub": user.email})
-    refresh_token = auth.create_refresh_token({"sub": user.email})
+    access_token = auth.create_access_token(auth.user_claims(user, family_id))
     logger.info("Login successful user_id=%s email=%s", user.id, user.email)
 
     return {
@@ -99,76 +148,46 @@ def login(payload: auth_schema.Login, db: Session = Depends(get_db)):
         "token_type": "bearer"
     }
 
-@router.post("/request-otp")
-def request_otp(payload: auth_schema.RequestOTP, db: Session = Depends(get_db)):
+@router.post("/request-otp", dependencies=[Depends(rate_limit("otp"))])
+async def request_otp(payload: auth_schema.RequestOTP, db: AsyncSession = Depends(get_db)):
     logger.info("OTP request initiated for email=%s", payload.email)
 
-    user = db.query(auth_models.User).filter(
+    user = await db.scalar(select(auth_models.User).where(
         auth_models.User.email == payload.email
-    ).first()
+    ))
 
     if not user:
         logger.warning("OTP request failed: user not found for email=%s", payload.email)
         raise HTTPException(status_code=404, detail="User not found")
 
-    db.query(auth_models.OTP).filter(
-        auth_models.OTP.email == payload.email,
-        auth_models.OTP.is_used == False
-    ).delete()
-
     otp_code = str(secrets.randbelow(900000) + 100000)
-
-    db_otp = auth_models.OTP(
-        email=payload.email,
-        otp_code=otp_code,
-        expires_at=datetime.utcnow() + timedelta(
-            minutes=settings.OTP_EXPIRE_MINUTES
-        )
-    )
-
-    db.add(db_otp)
-    db.commit()
+    await otp_store.issue(payload.email, otp_code, settings.OTP_EXPIRE_MINUTES * 60)
 
     send_otp_email(payload.email, otp_code)
     logger.info("OTP generated and sent for email=%s", payload.email)
 
     return {"message": "OTP sent successfully"}
 
-@router.post("/verify-otp", response_model=auth_schema.Token)
-def verify_otp(payload: auth_schema.VerifyOTP, db: Session = Depends(get_db)):
+@router.post("/verify-otp", response_model=auth_schema.Token, dependencies=[Depends(rate_limit("verify"))])
+async def verify_otp(payload: auth_schema.VerifyOTP, db: AsyncSession = Depends(get_db)):
     logger.info("OTP verification requested for email=%s", payload.email)
 
-    db_otp = db.query(auth_models.OTP).filter(
-        auth_models.OTP.email == payload.email,
-        auth_models.OTP.is_used == False
-    ).order_by(auth_models.OTP.id.desc()).first()
-
-    if not db_otp:
-        logger.warning("OTP verification failed for email=%s: OTP not found", payload.email)
-        raise HTTPException(status_code=400, detail="OTP not found")
-
-    if db_otp.expires_at < datetime.utcnow():
-        logger.warning("OTP verification failed for email=%s: OTP expired", payload.email)
-        raise HTTPException(status_code=400, detail="OTP expired")
+    await _check_otp(payload.email, payload.otp, "OTP verification")
 
-    if db_otp.otp_code != payload.otp:
-        logger.warning("OTP verification failed for email=%s: invalid OTP", payload.email)
-        raise HTTPException(status_code=400, detail="Invalid OTP")
-
-    user = db.query(auth_models.User).filter(
+    user = await db.scalar(select(auth_models.User).where(
         auth_models.User.email == payload.email
-    ).first()
+    ))
 
     if not user:
         logger.warning("OTP verification failed for email=%s: user not found", payload.email)
         raise HTTPException(status_code=404, detail="User not found")
 
-    db_otp.is_used = True
-    user.last_login = datetime.utcnow()
-    db.commit()
+    record_login(user)
+    family_id, refresh_token = start_refresh_family(db, user)
+    await _consume_otp(payload.email, payload.otp, "OTP verification", db)
+    await db.commit()
 
-    access_token = auth.create_access_token({"sub": user.email})
-    refresh_token = auth.create_refresh_token({"sub": user.email})
+    access_token = auth.create_access_token(auth.user_claims(user, family_id))
     logger.info("OTP verification successful for user_id=%s email=%s", user.id, user.email)
 
     return {
@@ -177,44 +196,50 @@ def verify_otp(payload: auth_schema.VerifyOTP, db: Session = Depends(get_db)):
         "token_type": "bearer"
     }
 
-@router.post("/forgot-password")
-def forgot_password(payload: auth_schema.ForgotPassword, db: Session = Depends(get_db)):
+@router.post("/refresh", response_model=auth_schema.Token)
+async def refresh(payload: auth_schema.RefreshRequest, db: AsyncSession = Depends(get_db)):
+    try:
+        claims = auth.decode_token(payload.refresh_token)
+    except JWTError:
+        logger.warning("Refresh rejected: invalid or expired token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token"
+        )
+
+    user, refresh_token = await rotate_refresh_token(claims, db)
+    access_token = auth.create_access_token(auth.user_claims(user, claims["fam"]))
+    logger.info("Tokens refreshed for user_id=%s", user.id)
+
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer"
+    }
+
+@router.post("/forgot-password", dependencies=[Depends(rate_limit("otp"))])
+async def forgot_password(payload: auth_schema.ForgotPassword, db: AsyncSession = Depends(get_db)):
     logger.info("Forgot-password requested for email=%s", payload.email)
 
-    user = db.query(auth_models.User).filter(
+    user = await db.scalar(select(auth_models.User).where(
         auth_models.User.email == payload.email
-    ).first()
+    ))
 
     if not user:
         logger.warning("Forgot-password failed: user not found for email=%s", payload.email)
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Delete previous unused OTPs
-    db.query(auth_models.OTP).filter(
-        auth_models.OTP.email == payload.email,
-        auth_models.OTP.is_used == False
-    ).delete()
-
+    # Issuing a new code replaces any previous unused one.
     otp_code = str(secrets.randbelow(900000) + 100000)
-
-    db_otp = auth_models.OTP(
-        email=user.email,
-        otp_code=otp_code,
-        expires_at=datetime.utcnow() + timedelta(
-            minutes=settings.OTP_EXPIRE_MINUTES
-        )
-    )
-
-    db.add(db_otp)
-    db.commit()
+    await otp_store.issue(user.email, otp_code, settings.OTP_EXPIRE_MINUTES * 60)
 
     send_otp_email(user.email, otp_code)
     logger.info("Forgot-password OTP sent for user_id=%s email=%s", user.id, user.email)
 
     return {"message": "Password reset OTP sent"}
 
-@router.post("/reset-password")
-def reset_password(payload: auth_schema.ResetPassword, db: Session = Depends(get_db)):
+@router.post("/reset-password", dependencies=[Depends(rate_limit("verify"))])
+async def reset_password(payload: auth_schema.ResetPassword, db: AsyncSession = Depends(get_db)):
     logger.info("Reset-password requested for email=%s", payload.email)
 
     if len(payload.new_password) < 8:
@@ -224,62 +249,78 @@ def reset_password(payload: auth_schema.ResetPassword, db: Session = Depends(get
             detail="Password must be at least 8 characters"
         )
 
-    db_otp = db.query(auth_models.OTP).filter(
-        auth_models.OTP.email == payload.email,
-        auth_models.OTP.is_used == False
-    ).order_by(auth_models.OTP.id.desc()).first()
-
-    if not db_otp:
-        logger.warning("Reset-password failed for email=%s: OTP not found", payload.email)
-        raise HTTPException(status_code=400, detail="OTP not found")
+    await _check_otp(payload.email, payload.otp, "Reset-password")
 
-    if db_otp.expires_at < datetime.utcnow():
-        logger.warning("Reset-password failed for email=%s: OTP expired", payload.email)
-        raise HTTPException(status_code=400, detail="OTP expired")
-
-    if db_otp.otp_code != payload.otp:
-        logger.warning("Reset-password failed for email=%s: invalid OTP", payload.email)
-        raise HTTPException(status_code=400, detail="Invalid OTP")
-
-    user = db.query(auth_models.User).filter(
+    user = await db.scalar(select(auth_models.User).where(
         auth_models.User.email == payload.email
-    ).first()
+    ))
 
     if not user:
         logger.warning("Reset-password failed: user not found for email=%s", payload.email)
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.password = hash_password(payload.new_password)
-    db_otp.is_used = True
+    user.password = await hash_password_async(payload.new_password)
+    user.token_version = (user.token_version or 0) + 1
 
-    db.commit()
+    await _consume_otp(payload.email, payload.otp, "Reset-password", db)
+    await db.commit()
+    token_version_cache.discard(user.id)
     logger.info("Password reset successful for user_id=%s email=%s", user.id, user.email)
 
     return {"message": "Password reset successful"}
 
+PROFILE_ROW = select(
+    auth_models.User.username,
+    auth_models.User.email,
+    auth_models.User.last_login
+)
+
 @router.get("/protected", response_model=auth_schema.ProtectedResponse)
-def protected_route(current_user: auth_models.User = Depends(get_current_user)):
+async def protected_route(
+    current_user: Principal = Depends(get_current_principal),
+    read_db: AsyncSession = Depends(get_read_db),
+    db: AsyncSession = Depends(get_db)
+):
+    # Token checks ran on the primary; the profile itself is a replica read.
+    query = PROFILE_ROW.where(auth_models.User.id == current_user.id)
+    profile = (await read_db.execute(query)).first()
+    if profile is None:
+        # Registered moments ago and not replicated yet.
+        profile = (await db.execute(query)).first()
+    if profile is None:
+        logger.warning("Protected route: user_id=%s not found", current_user.id)
+        raise HTTPException(status_code=404, detail="User not found")
+
     logger.info("Protected route accessed by user_id=%s", current_user.id)
     return {
-        "message": f"Welcome back, {current_user.username}",
+        "message": f"Welcome back, {profile.username}",
         "user": {
-            "username": current_user.username,
-            "email": current_user.email,
-            "last_login": current_user.last_login
+            "username": profile.username,
+            "email": profile.email,
+            "last_login": profile.last_login
         }
     }
 
 
 @router.post("/logout")
-def logout(
+async def logout(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     token = credentials.credentials
-    blacklisted_token = auth_models.TokenBlacklist(token=token)
+    try:
+        payload = auth.decode_token(token)
+    except JWTError:
+        logger.warning("Logout rejected: invalid or expired token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token"
+        )
 
-    db.add(blacklisted_token)
-    db.commit()
+    if payload.get("fam"):
+        await revoke_refresh_family(payload["fam"], db)
+    await revoke_token(auth.token_digest(token, payload), payload["exp"], db)
+    token_cache.discard(token)
     logger.info("User logged out and token blacklisted")
 
     return {"message": "Successfully logged out"}
@@ -0,0 +1,11 @@
+import logging
+from fastapi import APIRouter
+from app.core.tracing import slow_requests
+
+router = APIRouter(prefix="/debug", tags=["Debug"])
+logger = logging.getLogger(__name__)
+
+@router.get("/slow-requests")
+def recent_slow_requests():
+    logger.debug("Slow request dump requested")
+    return list(reversed(slow_requests))
@@ -1,5 +1,14 @@
 import logging
 from fastapi import APIRouter
+from app.auth.revocation import revocation_cache
+from app.auth.last_login import last_login_buffer
+from app.auth.security import hashing_pool
+from app.auth.token_cache import token_cache
+from app.auth.token_versions import token_version_cache
+from app.core.rate_limit import rate_limit_stats
+from app.db.database import replica_router
+from app.db.pool import pool_stats
+from app.utils.mailer import mail_dispatcher
 
 router = APIRouter(prefix="/health", tags=["Health"])
 logger = logging.getLogger(__name__)
@@ -8,3 +17,21 @@ logger = logging.getLogger(__name__)
 def health_check():
     logger.debug("Health check endpoint hit")
     return {"status": "ok"}
+
+
+@router.get("/caches")
+def cache_stats():
+    return {
+        "revocation": revocation_cache.stats(),
+        "tokens": token_cache.stats(),
+        "token_versions": token_version_cache.stats(),
+        "last_login": last_login_buffer.stats(),
+        "hashing": hashing_pool.stats(),
+        "mail": mail_dispatcher.stats(),
+        "rate_limit": dict(rate_limit_stats),
+    }
+
+
+@router.get("/db-pool")
+def db_pool_stats():
+    return {"pools": pool_stats(), "replica": replica_router.stats()}
@@ -0,0 +1,64 @@
+import logging
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.auth.revocation import revocation_cache
+from app.auth.security import hashing_pool
+from app.auth.token_cache import token_cache
+from app.auth.token_versions import token_version_cache
+from app.core.metrics import counter_lines, gauge_lines, render_metrics
+from app.db.pool import pool_stats
+from app.utils.mailer import mail_dispatcher
+
+router = APIRouter(tags=["Metrics"])
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Stats fields that only ever grow; everything else is a point-in-time gauge.
+CUMULATIVE_FIELDS = {
+    "hits", "misses", "expired", "evictions", "fallbacks", "refreshes",
+    "rejected", "sent", "failed", "retries", "connects",
+    "overflow_events", "timeouts",
+}
+
+
+def _stat_lines(name: str, documentation: str, field: str, samples: list[tuple[dict, float]]) -> list[str]:
+    render = counter_lines if field in CUMULATIVE_FIELDS else gauge_lines
+    return render(name, documentation, samples)
+
+
+def _pool_lines() -> list[str]:
+    lines = []
+    fields = ("in_use", "idle", "overflow", "overflow_events", "timeouts", "wait_max_ms")
+    for field in fields:
+        samples = [
+            ({"pool": name}, data[field])
+            for name, data in pool_stats().items()
+            if data.get(field) is not None
+        ]
+        lines += _stat_lines(f"db_pool_{field}", f"Connection pool {field}.", field, samples)
+    return lines
+
+
+def _component_lines() -> list[str]:
+    lines = []
+    for component, stats in (
+        ("revocation_cache", revocation_cache.stats()),
+        ("token_cache", token_cache.stats()),
+        ("token_version_cache", token_version_cache.stats()),
+        ("hashing_pool", hashing_pool.stats()),
+        ("mail", mail_dispatcher.stats()),
+    ):
+        for field, value in stats.items():
+            if isinstance(value, (int, float)):
+                lines += _stat_lines(f"{component}_{field}", f"{component} {field}.", field, [({}, value)])
+    return lines
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    logger.debug("Metrics endpoint hit")
+    return PlainTextResponse(
+        render_metrics((_pool_lines, _component_lines)),
+        media_type=CONTENT_TYPE,
+    )
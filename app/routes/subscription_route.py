@@ -1,123 +1,221 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 
-from app.db.database import get_db
+from app.db.database import IS_POSTGRES, get_db, get_read_db
 from app.models.subscription_models import SubscriptionPlan, UserSubscription
-from app.models.auth_models import User
+from app.auth.principal import Principal
 from app.schemas.subscription_schema import (
     PlanResponse,
     SubscribeRequest,
     SubscriptionResponse
 )
-from app.config.deps import get_current_user
+from app.config.config import settings
+from app.config.deps import get_current_principal
+from app.utils.plan_catalog import plan_catalog
 
 router = APIRouter(prefix="/subscriptions", tags=["Subscriptions"])
 logger = logging.getLogger(__name__)
 
 @router.get("/plans", response_model=list[PlanResponse])
-def get_plans(db: Session = Depends(get_db)):
-    plans = db.query(SubscriptionPlan).filter(
-        SubscriptionPlan.is_active == True
-    ).all()
-    logger.info("Fetched %s active subscription plans", len(plans))
-    return plans
+async def get_plans(request: Request, db: AsyncSession = Depends(get_read_db)):
+    await plan_catalog.ensure_loaded(db)
+    headers = {
+        "ETag": plan_catalog.etag,
+        "Cache-Control": f"public, max-age={settings.PLAN_CACHE_MAX_AGE_SECONDS}",
+    }
+    if plan_catalog.matches(request.headers.get("if-none-match")):
+        logger.debug("Plan catalog not modified etag=%s", plan_catalog.etag)
+        return Response(status_code=304, headers=headers)
+
+    logger.info("Fetched %s active subscription plans", len(plan_catalog.plans))
+    return Response(content=plan_catalog.body, media_type="application/json", headers=headers)
+
+# Subscription and plan in one joined, column-only select; no ORM hydration.
+ACTIVE_SUBSCRIPTION_ROW = select(
+    UserSubscription.id,
+    UserSubscription.start_date,
+    UserSubscription.end_date,
+    UserSubscription.status,
+    SubscriptionPlan.id.label("plan_id"),
+    SubscriptionPlan.name,
+    SubscriptionPlan.price,
+    SubscriptionPlan.duration_days,
+).join(SubscriptionPlan, SubscriptionPlan.id == UserSubscription.plan_id)
+
+subscription_adapter = TypeAdapter(SubscriptionResponse)
+
+def _render(subscription: SubscriptionResponse) -> Response:
+    """Serialise a trusted response straight to JSON bytes, skipping re-validation."""
+    return Response(content=subscription_adapter.dump_json(subscription), media_type="application/json")
+
+# Check the plan, expire the current subscription and insert the new one in
+# one statement. The plan is read (and share-locked) here rather than taken
+# from the catalog cache, so a plan deactivated or repriced a moment ago is
+# never sold; no row comes back when it is missing or inactive. The INSERT
+# reads from the ``expired`` CTE so the UPDATE finishes first and the partial
+# unique index never sees two active rows.
+REPLACE_ACTIVE_SUBSCRIPTION = text(
+    "WITH plan AS ("
+    "  SELECT id, name, price, duration_days FROM subscription_plans"
+    "  WHERE id = :plan_id AND is_active FOR SHARE"
+    "), expired AS ("
+    "  UPDATE user_subscriptions SET status = 'expired'"
+    "  WHERE user_id = :user_id AND status = 'active' AND EXISTS (SELECT 1 FROM plan)"
+    "  RETURNING id"
+    "), inserted AS ("
+    "  INSERT INTO user_subscriptions (user_id, plan_id, start_date, end_date, status) "
+    "  SELECT CAST(:user_id AS INTEGER), plan.id, CAST(:start_date AS TIMESTAMP), "
+    "  CAST(:start_date AS TIMESTAMP) + plan.duration_days * INTERVAL '1 day', 'active' "
+    "  FROM plan, (SELECT count(*) FROM expired) AS e "
+    "  RETURNING id, end_date"
+    ") "
+    "SELECT inserted.id, inserted.end_date, plan.id AS plan_id, plan.name, plan.price, plan.duration_days "
+    "FROM inserted, plan"
+)
+
+def _plan(row) -> PlanResponse:
+    return PlanResponse.model_construct(
+        id=row.plan_id, name=row.name, price=row.price, duration_days=row.duration_days
+    )
+
+async def _replace_active_subscription(
+    db: AsyncSession, user_id: int, plan_id: int, start_date: datetime
+) -> tuple[int, datetime, PlanResponse] | None:
+    """Return the new subscription's id, end date and plan, or ``None`` when
+    the plan is missing or inactive."""
+    if IS_POSTGRES:
+        row = (await db.execute(REPLACE_ACTIVE_SUBSCRIPTION, {
+            "user_id": user_id,
+            "plan_id": plan_id,
+            "start_date": start_date,
+        })).first()
+        return (row.id, row.end_date, _plan(row)) if row else None
+
+    # SQLite has no data-modifying CTEs; the same steps in one transaction.
+    plan = (await db.execute(
+        select(
+            SubscriptionPlan.id.label("plan_id"),
+            SubscriptionPlan.name,
+            SubscriptionPlan.price,
+            SubscriptionPlan.duration_days,
+        ).where(SubscriptionPlan.id == plan_id, SubscriptionPlan.is_active == True)
+    )).first()
+    if plan is None:
+        return None
+    end_date = start_date + timedelta(days=plan.duration_days)
+    await db.execute(
+        update(UserSubscription)
+        .where(UserSubscription.user_id == user_id, UserSubscription.status == "active")
+        .values(status="expired")
+    )
+    subscription_id = await db.scalar(
+        insert(UserSubscription)
+        .values(user_id=user_id, plan_id=plan_id, start_date=start_date, end_date=end_date, status="active")
+        .returning(UserSubscription.id)
+    )
+    return subscription_id, end_date, _plan(plan)
 
 @router.post("/subscribe", response_model=SubscriptionResponse)
-def subscribe(
+async def subscribe(
     payload: SubscribeRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     logger.info("Subscribe requested by user_id=%s for plan_id=%s", current_user.id, payload.plan_id)
-    plan = db.query(SubscriptionPlan).filter(
-        SubscriptionPlan.id == payload.plan_id,
-        SubscriptionPlan.is_active == True
-    ).first()
-
-    if not plan:
-        logger.warning(
-            "Subscribe failed for user_id=%s: plan_id=%s not found or inactive",
-            current_user.id,
-            payload.plan_id,
-        )
-        raise HTTPException(status_code=404, detail="Plan not found")
-
-    # Expire old subscription if exists
-    old_subscription = db.query(UserSubscription).filter(
-        UserSubscription.user_id == current_user.id,
-        UserSubscription.status == "active"
-    ).first()
-
-    if old_subscription:
-        old_subscription.status = "expired"
-        logger.info("Expired previous subscription id=%s for user_id=%s", old_subscription.id, current_user.id)
-
     start_date = datetime.utcnow()
-    end_date = start_date + timedelta(days=plan.duration_days)
 
-    new_subscription = UserSubscription(
-        user_id=current_user.id,
-        plan_id=plan.id,
+    # One retry: a concurrent subscribe can commit its row between our
+    # UPDATE and INSERT; the second pass expires that row too.
+    for attempt in range(2):
+        try:
+            created = await _replace_active_subscription(db, current_user.id, payload.plan_id, start_date)
+            if created is None:
+                await db.rollback()
+                logger.warning(
+                    "Subscribe failed for user_id=%s: plan_id=%s not found or inactive",
+                    current_user.id,
+                    payload.plan_id,
+                )
+                raise HTTPException(status_code=404, detail="Plan not found")
+            await db.commit()
+            subscription_id, end_date, plan = created
+            break
+        except IntegrityError:
+            # uq_user_subscriptions_active_user: a concurrent subscribe won.
+            await db.rollback()
+            if attempt:
+                logger.warning("Subscribe conflict for user_id=%s: concurrent active subscription", current_user.id)
+                raise HTTPException(status_code=409, detail="Subscription changed concurrently, please retry")
+    logger.info("Subscription created id=%s for user_id=%s", subscription_id, current_user.id)
+
+    return _render(SubscriptionResponse.model_construct(
+        id=subscription_id,
+        plan=plan,
         start_date=start_date,
         end_date=end_date,
         status="active"
-    )
-
-    db.add(new_subscription)
-    db.commit()
-    db.refresh(new_subscription)
-    logger.info("Subscription created id=%s for user_id=%s", new_subscription.id, current_user.id)
-
-    return new_subscription
+    ))
 
 
 # 🔹 3. My Subscription
 @router.get("/my-subscription", response_model=SubscriptionResponse)
-def my_subscription(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def my_subscription(
+    read_db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     logger.info("Fetching active subscription for user_id=%s", current_user.id)
-    subscription = db.query(UserSubscription).filter(
+    subscription = (await read_db.execute(ACTIVE_SUBSCRIPTION_ROW.where(
         UserSubscription.user_id == current_user.id,
         UserSubscription.status == "active"
-    ).first()
+    ))).first()
 
     if not subscription:
         logger.warning("No active subscription for user_id=%s", current_user.id)
         raise HTTPException(status_code=404, detail="No active subscription")
 
-    # Auto-expire if past date
+    # Lapsed but not yet swept by subscription_expirer.
     if subscription.end_date < datetime.utcnow():
-        subscription.status = "expired"
-        db.commit()
-        logger.warning("Subscription id=%s auto-expired for user_id=%s", subscription.id, current_user.id)
+        logger.warning("Subscription id=%s lapsed for user_id=%s", subscription.id, current_user.id)
         raise HTTPException(status_code=400, detail="Subscription expired")
 
     logger.info("Active subscription id=%s returned for user_id=%s", subscription.id, current_user.id)
-    return subscription
+    return _render(SubscriptionResponse.model_construct(
+        id=subscription.id,
+        plan=PlanResponse.model_construct(
+            id=subscription.plan_id,
+            name=subscription.name,
+            price=subscription.price,
+            duration_days=subscription.duration_days,
+        ),
+        start_date=subscription.start_date,
+        end_date=subscription.end_date,
+        status=subscription.status,
+    ))
 
 
 # 🔹 4. Cancel Subscription
 @router.post("/cancel")
-def cancel_subscription(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def cancel_subscription(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     logger.info("Cancel subscription requested by user_id=%s", current_user.id)
-    subscription = db.query(UserSubscription).filter(
+    subscription = await db.scalar(select(UserSubscription).where(
         UserSubscription.user_id == current_user.id,
         UserSubscription.status == "active"
-    ).first()
+    ))
 
     if not subscription:
         logger.warning("Cancel subscription failed: no active subscription for user_id=%s", current_user.id)
         raise HTTPException(status_code=404, detail="No active subscription")
 
     subscription.status = "canceled"
-    db.commit()
+    await db.commit()
     logger.info("Subscription id=%s canceled for user_id=%s", subscription.id, current_user.id)
 
     return {"message": "Subscription canceled successfully"}
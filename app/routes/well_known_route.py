@@ -0,0 +1,15 @@
+import logging
+from fastapi import APIRouter, Response
+
+from app.auth.jwt_codec import token_codec
+from app.config.config import settings
+
+router = APIRouter(prefix="/.well-known", tags=["Well-known"])
+logger = logging.getLogger(__name__)
+
+@router.get("/jwks.json")
+def jwks(response: Response):
+    """Public signing keys so other services can verify access tokens locally."""
+    response.headers["Cache-Control"] = f"public, max-age={settings.JWKS_CACHE_MAX_AGE_SECONDS}"
+    logger.debug("JWKS requested")
+    return token_codec.jwks()
@@ -0,0 +1,25 @@
+from pydantic import BaseModel, EmailStr
+from typing import Optional
+
+
+class BulkUserRow(BaseModel):
+    email: EmailStr
+    username: str
+    password: str
+    plan_id: Optional[int] = None
+    is_verified: bool = True
+
+
+class BulkRowError(BaseModel):
+    line: int
+    email: Optional[str] = None
+    error: str
+
+
+class BulkImportReport(BaseModel):
+    processed: int
+    created: int
+    subscribed: int
+    failed: int
+    errors: list[BulkRowError]
+    errors_truncated: bool = False
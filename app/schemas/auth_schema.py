@@ -26,6 +26,9 @@ class ResetPassword(BaseModel):
     otp: str
     new_password: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class Token(BaseModel):
     access_token: str
     refresh_token: str
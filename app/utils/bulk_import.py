@@ -0,0 +1,309 @@
+"""Bulk user import with optional subscription provisioning.
+
+Rows arrive as NDJSON or CSV (header line first) with ``email``,
+``username``, ``password`` and optional ``plan_id``/``is_verified``. They are
+processed in chunks: one pair of ``IN`` queries per chunk for uniqueness,
+passwords hashed across the hashing pool, then multi-row inserts for users
+and subscriptions committed in a single transaction per chunk. Bad rows are
+reported by line number and never abort the rest of the import.
+
+    python -m app.utils.bulk_import users.ndjson
+    python -m app.utils.bulk_import users.csv --format csv --chunk-size 500
+    cat users.ndjson | python -m app.utils.bulk_import -
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import sys
+from datetime import datetime, timedelta
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.auth.security import hash_passwords_async
+from app.config.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.auth_models import User
+from app.models.subscription_models import SubscriptionPlan, UserSubscription
+from app.schemas.admin_schema import BulkImportReport, BulkRowError, BulkUserRow
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("ndjson", "csv")
+MAX_REPORTED_ERRORS = 1000
+
+
+class RowParser:
+    """Turn input lines into dicts; CSV takes its field names from the first line.
+
+    CSV is parsed line by line, so quoted fields cannot contain newlines.
+    """
+
+    def __init__(self, fmt: str):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported import format: {fmt}")
+        self.fmt = fmt
+        self.header: list[str] | None = None
+
+    def parse(self, line: str) -> dict | None:
+        if not line.strip():
+            return None
+        if self.fmt == "ndjson":
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("Expected a JSON object")
+            return row
+        values = next(csv.reader([line]))
+        if self.header is None:
+            self.header = [name.strip() for name in values]
+            return None
+        if len(values) != len(self.header):
+            raise ValueError(f"Expected {len(self.header)} columns, got {len(values)}")
+        return {name: value for name, value in zip(self.header, values) if value != ""}
+
+
+class BulkImporter:
+    """Accumulates parsed rows and writes them ``chunk_size`` at a time."""
+
+    def __init__(self, fmt: str = "ndjson", chunk_size: int = settings.BULK_IMPORT_CHUNK_SIZE):
+        self.parser = RowParser(fmt)
+        self.chunk_size = chunk_size
+        self.chunk: list[tuple[int, BulkUserRow]] = []
+        self.seen_emails: set[str] = set()
+        self.seen_usernames: set[str] = set()
+        self.processed = 0
+        self.created = 0
+        self.subscribed = 0
+        self.failed = 0
+        self.errors: list[BulkRowError] = []
+
+    def _error(self, line_no: int, email: str | None, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(BulkRowError(line=line_no, email=email, error=message))
+
+    async def feed(self, line_no: int, line: str) -> None:
+        try:
+            data = self.parser.parse(line)
+            if data is None:
+                return
+        except ValueError as exc:
+            self.processed += 1
+            self._error(line_no, None, f"Malformed row: {exc}")
+            return
+
+        self.processed += 1
+        try:
+            row = BulkUserRow.model_validate(data)
+        except ValidationError as exc:
+            fields = ", ".join(".".join(map(str, err["loc"])) for err in exc.errors())
+            self._error(line_no, data.get("email"), f"Invalid fields: {fields}")
+            return
+
+        # Same rules and messages as /auth/register.
+        if len(row.password) < 8:
+            self._error(line_no, row.email, "Password must be at least 8 characters")
+            return
+        if row.email in self.seen_emails:
+            self._error(line_no, row.email, "Duplicate email in import")
+            return
+        if row.username in self.seen_usernames:
+            self._error(line_no, row.email, "Duplicate username in import")
+            return
+        self.seen_emails.add(row.email)
+        self.seen_usernames.add(row.username)
+
+        self.chunk.append((line_no, row))
+        if len(self.chunk) >= self.chunk_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        chunk, self.chunk = self.chunk, []
+        if not chunk:
+            return
+        async with AsyncSessionLocal() as db:
+            for attempt in range(2):
+                rows = await self._filter_existing(db, chunk)
+                # End the read transaction so no connection is held while hashing.
+                await db.commit()
+                if not rows:
+                    return
+                hashes = await hash_passwords_async([row.password for _, row in rows])
+                try:
+                    await self._write(db, rows, hashes)
+                    break
+                except IntegrityError:
+                    # A concurrent registration took an email or username after
+                    # the check; re-check once so only the conflicting rows fail.
+                    await db.rollback()
+                    if attempt:
+                        logger.warning("Bulk import chunk failed twice on conflicts lines=%s-%s",
+                                       chunk[0][0], chunk[-1][0])
+                        for line_no, row in rows:
+                            self._error(line_no, row.email, "Conflicting concurrent write")
+                        return
+                    chunk = rows
+
+        logger.info(
+            "Bulk import chunk written lines=%s-%s created=%s subscribed=%s failed=%s",
+            chunk[0][0], chunk[-1][0], self.created, self.subscribed, self.failed,
+        )
+
+    async def _filter_existing(self, db, chunk: list[tuple[int, BulkUserRow]]) -> list[tuple[int, BulkUserRow]]:
+        emails = [row.email for _, row in chunk]
+        usernames = [row.username for _, row in chunk]
+        taken_emails = set(await db.scalars(select(User.email).where(User.email.in_(emails))))
+        taken_usernames = set(await db.scalars(select(User.username).where(User.username.in_(usernames))))
+
+        rows = []
+        for line_no, row in chunk:
+            if row.email in taken_emails:
+                self._error(line_no, row.email, "Email already registered")
+            elif row.username in taken_usernames:
+                self._error(line_no, row.email, "Username already taken")
+            else:
+                rows.append((line_no, row))
+        return rows
+
+    async def _active_plans(self, db, rows: list[tuple[int, BulkUserRow]]) -> dict[int, int]:
+        """``plan_id -> duration_days`` for the chunk's plans that are active now.
+
+        Read (and share-locked) in the write transaction rather than taken from
+        the catalog cache, so a plan deactivated or changed a moment ago is not
+        provisioned.
+        """
+        plan_ids = {row.plan_id for _, row in rows if row.plan_id is not None}
+        if not plan_ids:
+            return {}
+        result = await db.execute(
+            select(SubscriptionPlan.id, SubscriptionPlan.duration_days)
+            .where(SubscriptionPlan.id.in_(plan_ids), SubscriptionPlan.is_active == True)
+            .with_for_update(read=True)
+        )
+        return dict(result.all())
+
+    async def _write(self, db, rows: list[tuple[int, BulkUserRow]], hashes: list[str]) -> None:
+        durations = await self._active_plans(db, rows)
+        accepted, rejected = [], []
+        for (line_no, row), hashed in zip(rows, hashes):
+            if row.plan_id is None or row.plan_id in durations:
+                accepted.append((line_no, row, hashed))
+            else:
+                rejected.append((line_no, row))
+        if not accepted:
+            await db.commit()
+            self._reject_plans(rejected)
+            return
+
+        result = await db.execute(
+            insert(User).returning(User.id, User.email),
+            [
+                {
+                    "email": row.email,
+                    "username": row.username,
+                    "password": hashed,
+                    "is_verified": row.is_verified,
+                    "token_version": 0,
+                }
+                for _, row, hashed in accepted
+            ],
+        )
+        user_ids = {email: user_id for user_id, email in result.all()}
+
+        now = datetime.utcnow()
+        subscriptions = [
+            {
+                "user_id": user_ids[row.email],
+                "plan_id": row.plan_id,
+                "start_date": now,
+                "end_date": now + timedelta(days=durations[row.plan_id]),
+                "status": "active",
+            }
+            for _, row, _ in accepted
+            if row.plan_id is not None
+        ]
+        if subscriptions:
+            await db.execute(insert(UserSubscription), subscriptions)
+        await db.commit()
+        self._reject_plans(rejected)
+        self.created += len(accepted)
+        self.subscribed += len(subscriptions)
+
+    def _reject_plans(self, rows: list[tuple[int, BulkUserRow]]) -> None:
+        # Recorded only once the chunk's transaction is settled, so a retried
+        # chunk does not report the same rows twice.
+        for line_no, row in rows:
+            self._error(line_no, row.email, "Plan not found")
+
+    async def finish(self) -> BulkImportReport:
+        await self.flush()
+        report = BulkImportReport(
+            processed=self.processed,
+            created=self.created,
+            subscribed=self.subscribed,
+            failed=self.failed,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors),
+        )
+        logger.info(
+            "Bulk import finished processed=%s created=%s subscribed=%s failed=%s",
+            report.processed, report.created, report.subscribed, report.failed,
+        )
+        return report
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a streamed byte body into decoded lines."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+async def import_lines(lines, fmt: str, chunk_size: int = settings.BULK_IMPORT_CHUNK_SIZE) -> BulkImportReport:
+    importer = BulkImporter(fmt, chunk_size)
+    line_no = 0
+    if hasattr(lines, "__aiter__"):
+        async for line in lines:
+            line_no += 1
+            await importer.feed(line_no, line)
+    else:
+        for line in lines:
+            line_no += 1
+            await importer.feed(line_no, line.rstrip("\r\n"))
+    return await importer.finish()
+
+
+def main() -> None:
+    from app.auth.security import hashing_pool
+    from app.core.logging_config import configure_logging
+
+    parser = argparse.ArgumentParser(description="Bulk import users and subscriptions.")
+    parser.add_argument("path", help="input file, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to the file extension, else ndjson")
+    parser.add_argument("--chunk-size", type=int, default=settings.BULK_IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    configure_logging()
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    try:
+        if args.path == "-":
+            report = asyncio.run(import_lines(sys.stdin, fmt, args.chunk_size))
+        else:
+            with open(args.path, encoding="utf-8", newline="") as handle:
+                report = asyncio.run(import_lines(handle, fmt, args.chunk_size))
+    finally:
+        hashing_pool.shutdown()
+    print(report.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
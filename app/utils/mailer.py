@@ -0,0 +1,264 @@
+import heapq
+import itertools
+import logging
+import queue
+import smtplib
+import socket
+import threading
+import time
+from email.mime.text import MIMEText
+
+from app.config.config import settings
+from app.core.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+# The session itself broke; worth one reconnect and resend.
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout)
+SMTP_SERVICE_CLOSING = 421
+
+
+def _is_permanent(exc: Exception) -> bool:
+    """5xx replies: the server refused this message, retrying will not help."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code >= 500
+    return False
+
+
+def _session_lost(exc: Exception) -> bool:
+    # A 4xx/5xx reply leaves the session usable, except 421 which closes it.
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return False
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code == SMTP_SERVICE_CLOSING
+    return True
+
+
+class MailQueueFull(Exception):
+    pass
+
+
+class MailDispatcher:
+    """Background SMTP sender that reuses one authenticated session.
+
+    ``enqueue`` only puts the message on an in-process queue. A single worker
+    thread drains it in batches over a persistent connection, reconnecting
+    when the server drops it. Transient failures (4xx replies, broken
+    connections) are retried with exponential backoff; 5xx refusals are
+    permanent and dropped without retrying or closing the session.
+
+    Retries wait in a not-before heap owned by the worker, so a failing
+    recipient never holds up the rest of the queue. The connection is closed
+    after ``idle_timeout`` seconds without traffic.
+    """
+
+    def __init__(
+        self,
+        host: str | None,
+        port: int | None,
+        username: str | None,
+        password: str | None,
+        use_tls: bool,
+        max_queue: int,
+        batch_size: int,
+        max_retries: int,
+        backoff: float,
+        idle_timeout: float,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.idle_timeout = idle_timeout
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        # (not_before, seq, to, raw, attempt); only touched by the worker thread.
+        self._retry_heap: list[tuple[float, int, str, str, int]] = []
+        self._retry_seq = itertools.count()
+        self._server: smtplib.SMTP | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.connects = 0
+        self.total_send_ms = 0.0
+        self.last_send_ms = 0.0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="mail-dispatcher", daemon=True)
+            self._thread.start()
+        logger.info("Mail dispatcher started")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        with self._lock:
+            thread = self._thread
+        if not thread or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        logger.info(
+            "Mail dispatcher stopped pending=%s retry_pending=%s",
+            self._queue.qsize(), len(self._retry_heap),
+        )
+
+    def enqueue(self, to: str, subject: str, body: str) -> None:
+        self.start()
+        msg = MIMEText(body)
+        msg["Subject"] = subject
+        msg["From"] = self.username
+        msg["To"] = to
+        try:
+            self._queue.put_nowait((to, msg.as_string(), 0))
+        except queue.Full:
+            logger.warning("Mail queue full; dropping message to recipient=%s", to)
+            raise MailQueueFull()
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        server.ehlo()
+        if self.use_tls:
+            server.starttls()
+            server.ehlo()
+        if self.password:
+            server.login(self.username, self.password)
+        self.connects += 1
+        logger.debug("SMTP session opened host=%s port=%s", self.host, self.port)
+        return server
+
+    def _disconnect(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            self._server.close()
+        self._server = None
+
+    def _send(self, to: str, raw: str) -> None:
+        if self._server is None:
+            with timed("smtp_connect"):
+                self._server = self._connect()
+        start = time.perf_counter()
+        try:
+            with timed("smtp_send"):
+                self._server.sendmail(self.username, to, raw)
+        except Exception as exc:
+            if not (isinstance(exc, RECONNECT_ERRORS) or getattr(exc, "smtp_code", None) == SMTP_SERVICE_CLOSING):
+                raise
+            # Session went stale while idle or the server closed it; reconnect once and resend.
+            self._disconnect()
+            with timed("smtp_connect"):
+                self._server = self._connect()
+            with timed("smtp_send"):
+                self._server.sendmail(self.username, to, raw)
+        self.last_send_ms = (time.perf_counter() - start) * 1000
+        self.total_send_ms += self.last_send_ms
+
+    def _due_retries(self) -> list:
+        now = time.monotonic()
+        due = []
+        while self._retry_heap and self._retry_heap[0][0] <= now and len(due) < self.batch_size:
+            _, _, to, raw, attempt = heapq.heappop(self._retry_heap)
+            due.append((to, raw, attempt))
+        return due
+
+    def _schedule_retry(self, to: str, raw: str, attempt: int, delay: float) -> None:
+        heapq.heappush(
+            self._retry_heap,
+            (time.monotonic() + delay, next(self._retry_seq), to, raw, attempt),
+        )
+
+    def _next_batch(self) -> list | None:
+        batch = self._due_retries()
+        if not batch:
+            timeout = self.idle_timeout
+            if self._retry_heap:
+                # Wake up in time for the earliest retry.
+                timeout = min(timeout, max(self._retry_heap[0][0] - time.monotonic(), 0.0))
+            try:
+                first = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                return self._due_retries()
+            if first is _STOP:
+                return None
+            batch.append(first)
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+            if not batch:
+                self._disconnect()
+                continue
+            for to, raw, attempt in batch:
+                try:
+                    self._send(to, raw)
+                    self.sent += 1
+                    logger.info("Email sent to recipient=%s", to)
+                except Exception as exc:
+                    if _is_permanent(exc):
+                        self.failed += 1
+                        logger.warning("Email to recipient=%s refused permanently: %s", to, exc)
+                        continue
+                    if _session_lost(exc):
+                        self._disconnect()
+                    if attempt < self.max_retries:
+                        self.retries += 1
+                        delay = self.backoff * (2 ** attempt)
+                        logger.warning(
+                            "Email to recipient=%s failed; retry %s in %.1fs",
+                            to, attempt + 1, delay,
+                        )
+                        self._schedule_retry(to, raw, attempt + 1, delay)
+                        continue
+                    self.failed += 1
+                    logger.exception("Giving up on email to recipient=%s", to)
+        self._disconnect()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "retry_pending": len(self._retry_heap),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "connects": self.connects,
+            "last_send_ms": round(self.last_send_ms, 2),
+            "avg_send_ms": round(self.total_send_ms / self.sent, 2) if self.sent else 0.0,
+        }
+
+
+mail_dispatcher = MailDispatcher(
+    host=settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    username=settings.SMTP_EMAIL,
+    password=settings.SMTP_PASSWORD,
+    use_tls=settings.SMTP_USE_TLS,
+    max_queue=settings.MAIL_QUEUE_SIZE,
+    batch_size=settings.MAIL_BATCH_SIZE,
+    max_retries=settings.MAIL_MAX_RETRIES,
+    backoff=settings.MAIL_RETRY_BACKOFF_SECONDS,
+    idle_timeout=settings.MAIL_IDLE_TIMEOUT_SECONDS,
+)
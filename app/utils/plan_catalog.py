@@ -0,0 +1,71 @@
+import hashlib
+import json
+import logging
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config.config import settings
+from app.models.subscription_models import SubscriptionPlan
+from app.schemas.subscription_schema import PlanResponse
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_PLANS = select(SubscriptionPlan).where(
+    SubscriptionPlan.is_active == True
+).order_by(SubscriptionPlan.id)
+
+
+class PlanCatalog:
+    """Active subscription plans held in memory with a pre-rendered JSON body.
+
+    Serves the ``/plans`` listing and its ETag only; subscribe and bulk import
+    read the plan row in their own write, so they never act on a stale entry.
+    Loaded at startup and rebuilt once ``ttl`` seconds have passed. The TTL is
+    the only way a plan edited outside this process (SQL, another worker)
+    reaches the listing, so it may show the old plans and ETag for up to
+    ``ttl`` seconds; code in this process that writes plans, like the seeder,
+    calls ``invalidate()``.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.plans: dict[int, PlanResponse] = {}
+        self.body = b"[]"
+        self.etag = ""
+        self._loaded_at: float | None = None
+
+    def _set(self, rows: list[SubscriptionPlan]) -> None:
+        plans = [PlanResponse.model_validate(row) for row in rows]
+        self.plans = {plan.id: plan for plan in plans}
+        self.body = json.dumps(
+            [plan.model_dump() for plan in plans], separators=(",", ":")
+        ).encode()
+        self.etag = '"%s"' % hashlib.sha256(self.body).hexdigest()
+        self._loaded_at = time.monotonic()
+        logger.info("Plan catalog loaded plans=%s etag=%s", len(plans), self.etag)
+
+    @property
+    def stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    def load(self, db: Session) -> None:
+        self._set(db.scalars(ACTIVE_PLANS).all())
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if self.stale:
+            self._set((await db.scalars(ACTIVE_PLANS)).all())
+
+    def matches(self, if_none_match: str | None) -> bool:
+        if not if_none_match or not self.etag:
+            return False
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or self.etag in tags
+
+
+plan_catalog = PlanCatalog(ttl=settings.PLAN_CATALOG_TTL_SECONDS)
@@ -1,6 +1,7 @@
 import logging
 from sqlalchemy.orm import Session
 from app.models.subscription_models import SubscriptionPlan
+from app.utils.plan_catalog import plan_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -48,4 +49,6 @@ def seed_subscription_plans(db: Session):
             inserted_count += 1
 
     db.commit()
+    if inserted_count:
+        plan_catalog.invalidate()
     logger.info("Subscription plans seeded: inserted=%s total_defined=%s", inserted_count, len(plans))
@@ -0,0 +1,61 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import select, text, update
+from sqlalchemy.engine import Connection
+
+from app.config.config import settings
+from app.core.scheduler import PeriodicJob
+from app.db.database import engine
+from app.models.subscription_models import UserSubscription
+
+logger = logging.getLogger(__name__)
+
+# Only the worker holding this lock runs expiry; see MIGRATION_LOCK_KEY.
+EXPIRY_LOCK_KEY = 7_310_002
+
+
+def expire_subscriptions(conn: Connection, batch_size: int) -> int:
+    """Mark lapsed active subscriptions expired, ``batch_size`` rows per transaction."""
+    total = 0
+    while True:
+        lapsed_ids = select(UserSubscription.id).where(
+            UserSubscription.status == "active",
+            UserSubscription.end_date < datetime.utcnow()
+        ).limit(batch_size).with_for_update(skip_locked=True)
+        expired = conn.execute(
+            update(UserSubscription)
+            .where(UserSubscription.id.in_(lapsed_ids))
+            .values(status="expired")
+        ).rowcount
+        conn.commit()
+        total += expired
+        if expired < batch_size:
+            return total
+
+
+def _expiry_job() -> None:
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            # Session-level lock so it spans the per-batch commits.
+            if not conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": EXPIRY_LOCK_KEY}):
+                logger.debug("Subscription expiry skipped: another worker holds the lock")
+                return
+            conn.commit()
+            try:
+                expired = expire_subscriptions(conn, settings.SUBSCRIPTION_EXPIRY_BATCH_SIZE)
+            finally:
+                conn.rollback()
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": EXPIRY_LOCK_KEY})
+                conn.commit()
+        else:
+            expired = expire_subscriptions(conn, settings.SUBSCRIPTION_EXPIRY_BATCH_SIZE)
+    if expired:
+        logger.info("Expired %s lapsed subscriptions", expired)
+
+
+subscription_expirer = PeriodicJob(
+    "subscription-expirer",
+    settings.SUBSCRIPTION_EXPIRY_INTERVAL_SECONDS,
+    _expiry_job,
+)
@@ -0,0 +1,37 @@
+import os
+
+# Settings the app needs to boot for a benchmark run. Real environment values win.
+BENCH_ENV = {
+    "SECRET_KEY": "bench-secret-key-not-for-production",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "REFRESH_TOKEN_EXPIRE_DAYS": "7",
+    "OTP_EXPIRE_MINUTES": "5",
+    "RATE_LIMIT_ENABLED": "false",
+    "LOG_LEVEL": "WARNING",
+}
+
+
+def apply_bench_env(extra: dict | None = None) -> dict:
+    for key, value in {**BENCH_ENV, **(extra or {})}.items():
+        os.environ.setdefault(key, value)
+    return dict(os.environ)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else 0.0,
+    }
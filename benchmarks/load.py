@@ -0,0 +1,260 @@
+"""Mixed-scenario load test for the auth and subscription endpoints.
+
+    python -m benchmarks.load --users 500 --concurrency 32 --duration 30
+    python -m benchmarks.load --database-url postgresql://user:pw@localhost:5432/bench
+    python -m benchmarks.load --base-url http://localhost:8000 --no-seed
+
+Without --base-url the app is started with uvicorn against --database-url
+(a local SQLite file by default) after seeding --users users, half of them
+with an active subscription. Reports p50/p95/p99 latency and throughput per
+endpoint. Needs the packages in benchmarks/requirements.txt.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from benchmarks.common import apply_bench_env, summarize
+
+PASSWORD = "benchmark-password"
+
+DEFAULT_MIX = "login=10,protected=30,plans=15,my_subscription=25,subscribe=8,register=5,logout=7"
+
+
+def seed(users: int) -> None:
+    from sqlalchemy import func, insert, select
+
+    from app.auth.security import _hash
+    from app.db.database import Base, SessionLocal, engine
+    from app.models.auth_models import User
+    from app.models.subscription_models import SubscriptionPlan, UserSubscription
+    from app.utils.subs_plan_seed import seed_subscription_plans
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed_subscription_plans(db)
+        existing = db.scalar(select(func.count()).select_from(User).where(User.email.like("bench_%")))
+        if existing >= users:
+            print(f"seed: {existing} benchmark users already present")
+            return
+
+        # One hash shared by every seeded user keeps seeding fast.
+        hashed = _hash(PASSWORD)
+        rows = [
+            {
+                "email": f"bench_{i}@example.com",
+                "username": f"bench_{i}",
+                "password": hashed,
+                "is_verified": True,
+            }
+            for i in range(existing, users)
+        ]
+        for start in range(0, len(rows), 1000):
+            db.execute(insert(User), rows[start:start + 1000])
+        db.commit()
+
+        plan_ids = list(db.scalars(select(SubscriptionPlan.id)))
+        user_ids = list(db.scalars(
+            select(User.id).where(User.email.like("bench_%")).order_by(User.id)
+        ))[existing:]
+        now = datetime.utcnow()
+        subscriptions = [
+            {
+                "user_id": user_id,
+                "plan_id": random.choice(plan_ids),
+                "start_date": now,
+                "end_date": now + timedelta(days=30),
+                "status": "active",
+            }
+            for user_id in user_ids[::2]
+        ]
+        for start in range(0, len(subscriptions), 1000):
+            db.execute(insert(UserSubscription), subscriptions[start:start + 1000])
+        db.commit()
+        print(f"seed: inserted {len(rows)} users and {len(subscriptions)} subscriptions")
+    finally:
+        db.close()
+
+
+def start_server(port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+
+
+async def wait_ready(client, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+class LoadRun:
+    def __init__(self, client, users: int, mix: dict[str, int]):
+        self.client = client
+        self.users = users
+        self.scenarios = list(mix)
+        self.weights = list(mix.values())
+        self.tokens: list[str] = []
+        self.plan_ids: list[int] = []
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def call(self, name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except Exception:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    def auth_header(self) -> dict | None:
+        if not self.tokens:
+            return None
+        return {"Authorization": f"Bearer {random.choice(self.tokens)}"}
+
+    async def login(self):
+        i = random.randrange(self.users)
+        response = await self.call(
+            "login", "POST", "/auth/login",
+            json={"email": f"bench_{i}@example.com", "password": PASSWORD},
+        )
+        if response is not None and response.status_code == 200:
+            self.tokens.append(response.json()["access_token"])
+
+    async def register(self):
+        suffix = uuid.uuid4().hex[:12]
+        await self.call(
+            "register", "POST", "/auth/register",
+            json={"email": f"new_{suffix}@example.com", "username": f"new_{suffix}", "password": PASSWORD},
+        )
+
+    async def protected(self):
+        if headers := self.auth_header():
+            await self.call("protected", "GET", "/auth/protected", headers=headers)
+
+    async def plans(self):
+        response = await self.call("plans", "GET", "/subscriptions/plans")
+        if response is not None and response.status_code == 200 and not self.plan_ids:
+            self.plan_ids = [plan["id"] for plan in response.json()]
+
+    async def my_subscription(self):
+        if headers := self.auth_header():
+            await self.call("my_subscription", "GET", "/subscriptions/my-subscription", headers=headers)
+
+    async def subscribe(self):
+        headers = self.auth_header()
+        if headers and self.plan_ids:
+            await self.call(
+                "subscribe", "POST", "/subscriptions/subscribe",
+                headers=headers, json={"plan_id": random.choice(self.plan_ids)},
+            )
+
+    async def logout(self):
+        # Keep a floor of live tokens so authenticated scenarios keep running.
+        if len(self.tokens) > 8:
+            token = self.tokens.pop(random.randrange(len(self.tokens)))
+            await self.call("logout", "POST", "/auth/logout", headers={"Authorization": f"Bearer {token}"})
+
+    async def worker(self, deadline: float):
+        while time.monotonic() < deadline:
+            scenario = random.choices(self.scenarios, self.weights)[0]
+            await getattr(self, scenario)()
+            # Scenarios without a token/plan return immediately; always yield.
+            await asyncio.sleep(0)
+
+    async def run(self, concurrency: int, duration: float) -> float:
+        await self.plans()
+        await asyncio.gather(*(self.login() for _ in range(min(concurrency, 16))))
+        self.latencies.clear()
+        self.errors.clear()
+        start = time.monotonic()
+        await asyncio.gather(*(self.worker(start + duration) for _ in range(concurrency)))
+        return time.monotonic() - start
+
+    def report(self, elapsed: float) -> dict:
+        return {
+            name: {**summarize(samples), "rps": len(samples) / elapsed, "errors": self.errors[name]}
+            for name, samples in sorted(self.latencies.items())
+        }
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = int(weight)
+    return mix
+
+
+async def drive(args, base_url: str) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        await wait_ready(client)
+        run = LoadRun(client, args.users, parse_mix(args.mix))
+        elapsed = await run.run(args.concurrency, args.duration)
+        return run.report(elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", help="benchmark an already running server")
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,...")
+    parser.add_argument("--no-seed", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        env = apply_bench_env({"DATABASE_URL": args.database_url})
+        if not args.no_seed:
+            seed(args.users)
+        server = start_server(args.port, env)
+        base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        results = asyncio.run(drive(args, base_url))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(10)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'endpoint':<18}{'n':>8}{'err':>6}{'rps':>9}{'p50 ms':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for name, r in results.items():
+        print(
+            f"{name:<18}{r['count']:>8}{r['errors']:>6}{r['rps']:>9.1f}"
+            f"{r['p50']:>9.2f}{r['p95']:>9.2f}{r['p99']:>9.2f}{r['max']:>9.2f}"
+        )
+    total = sum(r["count"] for r in results.values())
+    print(f"total requests: {total}  throughput: {sum(r['rps'] for r in results.values()):.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
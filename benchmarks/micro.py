@@ -0,0 +1,65 @@
+"""Microbenchmarks for the per-request crypto work.
+
+    python -m benchmarks.micro --iterations 200
+
+Hashing runs inline (HASH_WORKERS=0) so the numbers are the argon2 cost
+itself, not pool queueing.
+"""
+import argparse
+import json
+import time
+
+from benchmarks.common import apply_bench_env, summarize
+
+
+def _bench(fn, iterations: int) -> dict:
+    fn()  # warm-up
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--hash-iterations", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    apply_bench_env({"HASH_WORKERS": "0"})
+    from jose import jwt
+
+    from app.auth import auth
+    from app.auth.security import hash_password, verify_password
+    from app.auth.token_cache import token_cache
+    from app.config.config import settings
+
+    hashed = hash_password("benchmark-password")
+    claims = {"sub": "bench@example.com", "uid": 1, "username": "bench", "ver": 0}
+    token = auth.create_access_token(claims)
+
+    results = {
+        "hash_password": _bench(lambda: hash_password("benchmark-password"), args.hash_iterations),
+        "verify_password": _bench(lambda: verify_password("benchmark-password", hashed), args.hash_iterations),
+        "create_access_token": _bench(lambda: auth.create_access_token(claims), args.iterations),
+        "jwt.decode": _bench(
+            lambda: jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]),
+            args.iterations,
+        ),
+        "decode_token": _bench(lambda: auth.decode_token(token), args.iterations),
+        "token_cache.decode": _bench(lambda: token_cache.decode(token), args.iterations),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'operation':<22}{'n':>6}{'mean ms':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, r in results.items():
+        print(f"{name:<22}{r['count']:>6}{r['mean']:>10.3f}{r['p50']:>10.3f}{r['p95']:>10.3f}{r['p99']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
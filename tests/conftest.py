@@ -0,0 +1,77 @@
+import asyncio
+import os
+import tempfile
+
+# Settings are read at import time, so configure the app before importing it.
+_db_path = os.path.join(tempfile.mkdtemp(prefix="uat-tests-"), "test.db")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_db_path}",
+    "SECRET_KEY": "test-secret-key-0123456789abcdef",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "REFRESH_TOKEN_EXPIRE_DAYS": "7",
+    "OTP_EXPIRE_MINUTES": "5",
+    "RATE_LIMIT_ENABLED": "false",
+    "HASH_WORKERS": "0",
+    "LOG_ASYNC": "false",
+    "LOG_LEVEL": "WARNING",
+    "ARGON2_TIME_COST": "1",
+    "ARGON2_MEMORY_COST": "8",
+    "ARGON2_PARALLELISM": "1",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import AsyncSessionLocal, Base, engine
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db_tables():
+    Base.metadata.create_all(bind=engine)
+    yield
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    # A private database for tests that count rows or plans.
+    path = tmp_path / "test.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return path
+
+
+@pytest.fixture
+def db(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def async_session(db_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    run(engine.dispose())
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def with_session(fn):
+    async with AsyncSessionLocal() as db:
+        return await fn(db)
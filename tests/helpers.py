@@ -0,0 +1,20 @@
+import uuid
+
+PASSWORD = "correct-horse-battery"
+
+
+def register_and_login(client) -> dict:
+    suffix = uuid.uuid4().hex[:10]
+    email = f"user_{suffix}@example.com"
+    response = client.post(
+        "/auth/register",
+        json={"email": email, "username": f"user_{suffix}", "password": PASSWORD},
+    )
+    assert response.status_code == 201, response.text
+    response = client.post("/auth/login", json={"email": email, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,88 @@
+import json
+import uuid
+
+from sqlalchemy import select, update
+
+from app.models.subscription_models import SubscriptionPlan
+from app.utils.bulk_import import import_lines
+from app.utils.plan_catalog import plan_catalog
+from tests.conftest import run, with_session
+from tests.helpers import PASSWORD
+
+
+def set_active(plan_id: int, active: bool) -> None:
+    async def apply(db):
+        await db.execute(update(SubscriptionPlan).where(SubscriptionPlan.id == plan_id).values(is_active=active))
+        await db.commit()
+    run(with_session(apply))
+
+
+def plan_ids() -> list[int]:
+    async def fetch(db):
+        return list(await db.scalars(select(SubscriptionPlan.id).order_by(SubscriptionPlan.id)))
+    return run(with_session(fetch))
+
+
+def row(plan_id: int | None = None, **overrides) -> str:
+    suffix = uuid.uuid4().hex[:10]
+    data = {
+        "email": f"bulk_{suffix}@example.com",
+        "username": f"bulk_{suffix}",
+        "password": PASSWORD,
+        "plan_id": plan_id,
+    }
+    data.update(overrides)
+    return json.dumps(data)
+
+
+def test_rows_are_created_and_subscribed(client):
+    plan_id = plan_ids()[0]
+    report = run(import_lines([row(plan_id), row(), row(plan_id)], "ndjson", chunk_size=2))
+
+    assert (report.processed, report.created, report.subscribed, report.failed) == (3, 3, 2, 0)
+
+
+def test_bad_rows_are_reported_by_line(client):
+    taken = json.loads(row())
+    assert run(import_lines([json.dumps(taken)], "ndjson")).created == 1
+
+    lines = [
+        row(),
+        json.dumps(taken),
+        row(plan_id=999_999),
+        row(password="short"),
+        "not json",
+    ]
+    report = run(import_lines(lines, "ndjson"))
+
+    assert (report.created, report.failed) == (1, 4)
+    assert [(error.line, error.error) for error in report.errors] == [
+        (4, "Password must be at least 8 characters"),
+        (5, "Malformed row: Expecting value: line 1 column 1 (char 0)"),
+        (2, "Email already registered"),
+        (3, "Plan not found"),
+    ]
+
+
+def test_csv_takes_columns_from_header(client):
+    suffix = uuid.uuid4().hex[:10]
+    lines = ["email,username,password", f"csv_{suffix}@example.com,csv_{suffix},{PASSWORD}"]
+    report = run(import_lines(lines, "csv"))
+
+    assert (report.processed, report.created) == (1, 1)
+
+
+def test_plan_deactivated_after_catalog_load_is_not_provisioned(client):
+    active_plan, retired_plan = plan_ids()[:2]
+    assert client.get("/subscriptions/plans").status_code == 200
+    assert retired_plan in plan_catalog.plans
+
+    set_active(retired_plan, False)
+    try:
+        report = run(import_lines([row(active_plan), row(retired_plan)], "ndjson"))
+    finally:
+        set_active(retired_plan, True)
+
+    assert (report.created, report.subscribed, report.failed) == (1, 1, 1)
+    assert report.errors[0].line == 2
+    assert report.errors[0].error == "Plan not found"
@@ -0,0 +1,132 @@
+import base64
+import json
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jose.exceptions import ExpiredSignatureError, JWTError
+
+from app.auth.jwt_codec import CompactCodec, hmac_key, load_private_key, load_public_key
+
+SECRET = "codec-test-secret-0123456789abcdef"
+
+
+def b64(data: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+
+def claims(**extra) -> dict:
+    return {"sub": "a@example.com", "exp": int(time.time()) + 60, **extra}
+
+
+@pytest.fixture
+def legacy():
+    key = hmac_key(SECRET, "HS256")
+    return CompactCodec(key, [], key)
+
+
+def private_pem(key) -> bytes:
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+@pytest.fixture
+def ed_pem() -> bytes:
+    return private_pem(ed25519.Ed25519PrivateKey.generate())
+
+
+def test_round_trip(legacy):
+    assert legacy.decode(legacy.encode(claims()))["sub"] == "a@example.com"
+
+
+def test_tampered_payload_rejected(legacy):
+    header, _, signature = legacy.encode(claims()).split(".")
+    forged = b64(claims(sub="admin@example.com"))
+    with pytest.raises(JWTError):
+        legacy.decode(f"{header}.{forged}.{signature}")
+
+
+@pytest.mark.parametrize("respell", [
+    lambda s: s + "=",
+    lambda s: s[:-1] + chr(ord(s[-1]) ^ 1),
+    lambda s: s.replace("-", "+").replace("_", "/") if ("-" in s or "_" in s) else s + "!",
+])
+def test_non_canonical_encoding_rejected(legacy, respell):
+    header, payload, signature = legacy.encode(claims()).split(".")
+    with pytest.raises(JWTError):
+        legacy.decode(f"{header}.{payload}.{respell(signature)}")
+
+
+def test_none_algorithm_rejected(legacy):
+    token = f"{b64({'alg': 'none', 'typ': 'JWT'})}.{b64(claims())}."
+    with pytest.raises(JWTError):
+        legacy.decode(token)
+
+
+def test_unknown_crit_rejected(legacy):
+    import jwt
+
+    token = jwt.encode(claims(), SECRET, algorithm="HS256", headers={"crit": ["exp2"], "exp2": 1})
+    with pytest.raises(JWTError):
+        legacy.decode(token)
+
+
+def test_expired_rejected(legacy):
+    with pytest.raises(ExpiredSignatureError):
+        legacy.decode(legacy.encode(claims(exp=int(time.time()) - 1)))
+
+
+def test_hmac_token_with_asymmetric_kid_rejected(ed_pem):
+    import jwt
+
+    key = load_private_key("k1", ed_pem)
+    codec = CompactCodec(key, [key])
+    # Algorithm confusion: HMAC over the published public key.
+    public_pem = key.verifying.public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    token = jwt.encode(claims(), "x", algorithm="HS256", headers={"kid": "k1"})
+    with pytest.raises(JWTError):
+        codec.decode(token)
+    assert codec.decode(codec.encode(claims()))["sub"] == "a@example.com"
+    assert load_public_key("k1", public_pem).jwk == key.jwk
+
+
+def test_legacy_tokens_rejected_without_legacy_key(ed_pem, legacy):
+    key = load_private_key("k1", ed_pem)
+    codec = CompactCodec(key, [key], legacy_key=None)
+    with pytest.raises(JWTError):
+        codec.decode(legacy.encode(claims()))
+
+
+def test_public_pem_is_not_a_private_key(ed_pem):
+    public_pem = load_private_key("k1", ed_pem).verifying.public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    with pytest.raises(ValueError):
+        load_private_key("k1", public_pem)
+
+
+@pytest.mark.parametrize("generate, alg", [
+    (ed25519.Ed25519PrivateKey.generate, "EdDSA"),
+    (lambda: ec.generate_private_key(ec.SECP256R1()), "ES256"),
+])
+def test_asymmetric_round_trip_and_jwks(generate, alg):
+    key = load_private_key("k1", private_pem(generate()))
+    codec = CompactCodec(key, [key])
+
+    assert key.alg == alg
+    assert codec.decode(codec.encode(claims()))["sub"] == "a@example.com"
+    assert [jwk["kid"] for jwk in codec.jwks()["keys"]] == ["k1"]
+
+
+def test_legacy_tokens_verify_after_switching_keys(ed_pem, legacy):
+    key = load_private_key("k1", ed_pem)
+    codec = CompactCodec(key, [key], legacy_key=legacy.signing_key)
+
+    assert codec.decode(legacy.encode(claims()))["sub"] == "a@example.com"
+    assert all(jwk["kty"] != "oct" for jwk in codec.jwks()["keys"])
@@ -0,0 +1,46 @@
+import json
+import logging
+
+from app.config.config import settings
+from app.core import logging_config
+from app.core.logging_config import JsonFormatter, SuccessSampler, _level_overrides
+
+
+def make_record(name: str, level: int, message: str = "hello") -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, message, None, None)
+
+
+def test_json_formatter_emits_one_object():
+    data = json.loads(JsonFormatter().format(make_record("app.main", logging.INFO)))
+    assert (data["level"], data["logger"], data["message"]) == ("INFO", "app.main", "hello")
+
+
+def test_sampler_only_drops_sampled_successes():
+    sampler = SuccessSampler(["app.routes"], rate=0.0)
+
+    assert not sampler.filter(make_record("app.routes.auth_route", logging.INFO))
+    assert sampler.filter(make_record("app.routes.auth_route", logging.WARNING))
+    assert sampler.filter(make_record("app.db", logging.INFO))
+
+
+def test_level_overrides():
+    assert _level_overrides("app.routes=warning, sqlalchemy.engine=INFO,") == {
+        "app.routes": {"level": "WARNING"},
+        "sqlalchemy.engine": {"level": "INFO"},
+    }
+
+
+def test_shutdown_hook_registered_once(monkeypatch):
+    registered = []
+    monkeypatch.setattr(settings, "LOG_ASYNC", True)
+    monkeypatch.setattr(logging_config, "_atexit_registered", False)
+    monkeypatch.setattr(logging_config.atexit, "register", registered.append)
+    handlers = list(logging.getLogger().handlers)
+    try:
+        for _ in range(3):
+            logging_config.configure_logging()
+    finally:
+        logging_config.shutdown_logging()
+        logging.getLogger().handlers[:] = handlers
+
+    assert registered == [logging_config.shutdown_logging]
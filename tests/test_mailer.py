@@ -0,0 +1,152 @@
+import socketserver
+import threading
+import time
+import uuid
+
+import pytest
+
+from app.config import deps
+from app.utils.mailer import MailDispatcher, MailQueueFull
+from tests.helpers import PASSWORD
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: refuses ``bad@`` recipients with 550 and,
+    when ``close_next`` is set, answers the next MAIL with 421 and hangs up."""
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply("220 stub ready")
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "MAIL":
+                server.mail_commands += 1
+                if server.close_next:
+                    server.close_next = False
+                    self.reply("421 closing connection")
+                    return
+                self.reply("250 ok")
+            elif verb == "RCPT":
+                self.reply("550 no such user" if "bad@" in command else "250 ok")
+            elif verb == "DATA":
+                self.reply("354 end with .")
+                for line in self.rfile:
+                    if line.rstrip(b"\r\n") == b".":
+                        break
+                server.delivered += 1
+                self.reply("250 queued")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubSMTPHandler)
+        self.connections = 0
+        self.mail_commands = 0
+        self.delivered = 0
+        self.close_next = False
+
+
+@pytest.fixture
+def smtp_server():
+    server = StubSMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def dispatcher(smtp_server):
+    mailer = MailDispatcher(
+        host="127.0.0.1",
+        port=smtp_server.server_address[1],
+        username="noreply@example.com",
+        password=None,
+        use_tls=False,
+        max_queue=10,
+        batch_size=10,
+        max_retries=2,
+        backoff=0.01,
+        idle_timeout=5.0,
+    )
+    yield mailer
+    mailer.stop()
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the mail dispatcher"
+        time.sleep(0.01)
+
+
+def test_batch_shares_one_session(dispatcher, smtp_server):
+    for i in range(3):
+        dispatcher.enqueue(f"user{i}@example.com", "OTP", "123456")
+    wait_for(lambda: dispatcher.sent == 3)
+
+    assert dispatcher.stats()["connects"] == 1
+    assert smtp_server.connections == 1
+    assert smtp_server.delivered == 3
+
+
+def test_permanent_refusal_is_not_retried(dispatcher, smtp_server):
+    dispatcher.enqueue("bad@example.com", "OTP", "123456")
+    dispatcher.enqueue("good@example.com", "OTP", "123456")
+    wait_for(lambda: dispatcher.sent + dispatcher.failed == 2)
+
+    stats = dispatcher.stats()
+    assert (stats["sent"], stats["failed"], stats["retries"]) == (1, 1, 0)
+    # The 550 leaves the session open for the next message.
+    assert stats["connects"] == 1
+    assert smtp_server.connections == 1
+    assert smtp_server.mail_commands == 2
+
+
+def test_service_closing_reconnects_once(dispatcher, smtp_server):
+    smtp_server.close_next = True
+    dispatcher.enqueue("good@example.com", "OTP", "123456")
+    wait_for(lambda: dispatcher.sent == 1)
+
+    stats = dispatcher.stats()
+    assert (stats["connects"], stats["retries"], stats["failed"]) == (2, 0, 0)
+    assert smtp_server.delivered == 1
+
+
+def test_full_queue_raises(monkeypatch):
+    stalled = MailDispatcher(None, None, None, None, False, 1, 1, 0, 0.0, 1.0)
+    monkeypatch.setattr(stalled, "start", lambda: None)
+
+    stalled.enqueue("first@example.com", "OTP", "123456")
+    with pytest.raises(MailQueueFull):
+        stalled.enqueue("second@example.com", "OTP", "123456")
+
+
+def test_full_queue_returns_503(client, monkeypatch):
+    stalled = MailDispatcher(None, None, None, None, False, 1, 1, 0, 0.0, 1.0)
+    monkeypatch.setattr(stalled, "start", lambda: None)
+    monkeypatch.setattr(deps, "mail_dispatcher", stalled)
+
+    suffix = uuid.uuid4().hex[:10]
+    email = f"mail_{suffix}@example.com"
+    body = {"email": email, "username": f"mail_{suffix}", "password": PASSWORD}
+    assert client.post("/auth/register", json=body).status_code == 201
+
+    assert client.post("/auth/forgot-password", json={"email": email}).status_code == 200
+    response = client.post("/auth/forgot-password", json={"email": email})
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Failed to send OTP email"
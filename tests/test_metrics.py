@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core import metrics
+from app.core.metrics import (
+    Counter,
+    Histogram,
+    RequestStats,
+    counter_lines,
+    gauge_lines,
+    instrument_engine,
+    render_metrics,
+)
+from tests.helpers import bearer, register_and_login
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    # Metrics register themselves on creation; keep test ones out of /metrics.
+    monkeypatch.setattr(metrics, "REGISTRY", [])
+    return metrics.REGISTRY
+
+
+def test_counter_renders_escaped_labels(registry):
+    counter = Counter("things_total", "Things.")
+    counter.inc(route='/a"b')
+    counter.inc(2, route='/a"b')
+
+    assert render_metrics().splitlines() == [
+        "# HELP things_total Things.",
+        "# TYPE things_total counter",
+        'things_total{route="/a\\"b"} 3.0',
+    ]
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, route="/")
+
+    lines = render_metrics().splitlines()
+    assert 'latency_seconds_bucket{route="/",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{route="/",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/"} 3' in lines
+
+
+def test_gauge_lines_render_external_samples():
+    assert gauge_lines("pool_idle", "Idle.", [({"pool": "sync"}, 2)]) == [
+        "# HELP pool_idle Idle.",
+        "# TYPE pool_idle gauge",
+        'pool_idle{pool="sync"} 2.0',
+    ]
+
+
+def test_counter_lines_add_total_suffix():
+    assert counter_lines("cache_hits", "Hits.", [({}, 3)]) == [
+        "# HELP cache_hits_total Hits.",
+        "# TYPE cache_hits_total counter",
+        "cache_hits_total 3.0",
+    ]
+
+
+def test_engine_hooks_count_queries_per_request():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    stats = RequestStats()
+    token = metrics.current_request_stats.set(stats)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    finally:
+        metrics.current_request_stats.reset(token)
+
+    assert stats.queries == 2
+    assert stats.db_seconds > 0
+
+
+def metric_types(body: str) -> dict[str, str]:
+    return {
+        line.split()[2]: line.split()[3]
+        for line in body.splitlines()
+        if line.startswith("# TYPE ")
+    }
+
+
+def test_running_totals_are_counters(client):
+    token = register_and_login(client)
+    client.get("/auth/protected", headers=bearer(token))
+    types = metric_types(client.get("/metrics").text)
+
+    assert types["token_cache_hits_total"] == "counter"
+    assert types["mail_sent_total"] == "counter"
+    assert types["revocation_cache_evictions_total"] == "counter"
+    assert "token_cache_hits" not in types
+    assert types["token_cache_size"] == "gauge"
+    assert types["mail_queue_depth"] == "gauge"
@@ -0,0 +1,159 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.auth import otp_store as otp_store_module
+from app.auth.otp_store import (
+    OTP_EXPIRED,
+    OTP_INVALID,
+    OTP_NOT_FOUND,
+    OTP_OK,
+    MemoryOTPStore,
+    RedisOTPStore,
+    SqlOTPStore,
+    build_otp_store,
+    otp_store,
+)
+from app.routes import auth_route
+from tests.conftest import run, with_session
+from tests.helpers import PASSWORD
+
+CODE = "123456"
+
+
+def register(client) -> str:
+    suffix = uuid.uuid4().hex[:10]
+    email = f"otp_{suffix}@example.com"
+    response = client.post(
+        "/auth/register",
+        json={"email": email, "username": f"otp_{suffix}", "password": PASSWORD},
+    )
+    assert response.status_code == 201, response.text
+    return email
+
+
+def reset(client, email: str, otp: str = CODE):
+    return client.post(
+        "/auth/reset-password",
+        json={"email": email, "otp": otp, "new_password": "another-password"},
+    )
+
+
+def test_failed_reset_does_not_burn_code(client, monkeypatch):
+    email = register(client)
+    run(otp_store.issue(email, CODE, 300))
+
+    async def pool_busy(password):
+        raise HTTPException(status_code=503, detail="Server busy, retry shortly")
+
+    monkeypatch.setattr(auth_route, "hash_password_async", pool_busy)
+    assert reset(client, email).status_code == 503
+    monkeypatch.undo()
+
+    assert reset(client, email).status_code == 200
+    assert reset(client, email).status_code == 400
+
+
+def test_wrong_code_is_rejected_before_work(client):
+    email = register(client)
+    run(otp_store.issue(email, CODE, 300))
+    assert reset(client, email, "000000").status_code == 400
+    assert reset(client, email).status_code == 200
+
+
+def test_memory_check_does_not_consume():
+    store = MemoryOTPStore()
+    run(store.issue("a@example.com", CODE, 300))
+    assert run(store.check("a@example.com", CODE)) == OTP_OK
+    assert run(store.consume("a@example.com", "654321")) == OTP_INVALID
+    assert run(store.consume("a@example.com", CODE)) == OTP_OK
+    assert run(store.consume("a@example.com", CODE)) == OTP_NOT_FOUND
+
+
+@pytest.mark.usefixtures("db_tables")
+def test_sql_consume_is_undone_with_callers_transaction():
+    store = SqlOTPStore()
+    email = f"sql_{uuid.uuid4().hex[:10]}@example.com"
+    run(store.issue(email, CODE, 300))
+
+    async def consume_then_rollback(db):
+        assert await store.consume(email, CODE, db) == OTP_OK
+        await db.rollback()
+
+    run(with_session(consume_then_rollback))
+    assert run(store.consume(email, CODE)) == OTP_OK
+    assert run(store.check(email, CODE)) == OTP_NOT_FOUND
+
+
+def test_memory_reissue_replaces_code():
+    store = MemoryOTPStore()
+    run(store.issue("a@example.com", "111111", 300))
+    run(store.issue("a@example.com", CODE, 300))
+    assert run(store.check("a@example.com", "111111")) == OTP_INVALID
+    assert run(store.consume("a@example.com", CODE)) == OTP_OK
+
+
+def test_memory_expired_codes_are_evicted():
+    store = MemoryOTPStore(resolution=0.01)
+
+    async def scenario():
+        await store.issue("a@example.com", CODE, 0.02)
+        await store.issue("b@example.com", CODE, 0.02)
+        await asyncio.sleep(0.05)
+        assert await store.check("a@example.com", CODE) in (OTP_EXPIRED, OTP_NOT_FOUND)
+        assert len(store) == 0
+
+    run(scenario())
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        build_otp_store("carrier-pigeon")
+
+
+def test_reset_rejects_old_tokens_on_principal_routes(client):
+    email = register(client)
+    login = client.post("/auth/login", json={"email": email, "password": PASSWORD}).json()
+    headers = {"Authorization": f"Bearer {login['access_token']}"}
+    assert client.get("/subscriptions/my-subscription", headers=headers).status_code == 404
+
+    run(otp_store.issue(email, CODE, 300))
+    assert reset(client, email).status_code == 200
+
+    response = client.get("/subscriptions/my-subscription", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+
+
+def test_redis_consume_is_compare_and_delete():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def scenario():
+        store = RedisOTPStore(client=fakeredis.aioredis.FakeRedis(decode_responses=True))
+        await store.issue("r@example.com", CODE, 300)
+        assert await store.check("r@example.com", CODE) == OTP_OK
+        assert await store.consume("r@example.com", "654321") == OTP_INVALID
+        # Two verifiers racing on the same code: exactly one wins.
+        results = await asyncio.gather(*(store.consume("r@example.com", CODE) for _ in range(2)))
+        assert sorted(results) == [OTP_NOT_FOUND, OTP_OK]
+
+        await store.issue("r@example.com", CODE, 0.05)
+        await asyncio.sleep(0.1)
+        assert await store.consume("r@example.com", CODE) == OTP_NOT_FOUND
+
+    run(scenario())
+
+
+def test_default_backend_follows_redis_url(monkeypatch):
+    monkeypatch.setattr(otp_store_module.settings, "REDIS_URL", None)
+    assert isinstance(build_otp_store(None), SqlOTPStore)
+    monkeypatch.setattr(otp_store_module.settings, "REDIS_URL", "redis://localhost:6379/0")
+    assert isinstance(build_otp_store(None), RedisOTPStore)
+
+
+def test_memory_backend_refused_with_several_workers(monkeypatch):
+    monkeypatch.setattr(otp_store_module.settings, "WEB_CONCURRENCY", 2)
+    with pytest.raises(ValueError):
+        build_otp_store("memory")
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.config.config import settings
+from app.core import rate_limit
+from app.core.rate_limit import MemoryRateLimiter, RedisRateLimiter, client_ip, parse_rate
+from tests.conftest import run
+
+
+def login_request(email: str) -> Request:
+    body = json.dumps({"email": email}).encode()
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {"type": "http", "method": "POST", "headers": [], "client": ("10.0.0.1", 1234)}
+    return Request(scope, receive)
+
+
+def make_request(forwarded: list[str]) -> Request:
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded]
+    return Request({"type": "http", "headers": headers, "client": ("10.0.0.1", 1234)})
+
+
+def test_forwarded_header_ignored_by_default():
+    assert client_ip(make_request(["203.0.113.9"])) == "10.0.0.1"
+
+
+def test_forwarded_uses_rightmost_trusted_hop(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXY_HOPS", 1)
+    # The client forged the first entry; the proxy appended the real peer.
+    assert client_ip(make_request(["1.2.3.4, 198.51.100.7"])) == "198.51.100.7"
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXY_HOPS", 2)
+    assert client_ip(make_request(["1.2.3.4, 198.51.100.7", "10.1.1.1"])) == "198.51.100.7"
+
+
+def test_parse_rate():
+    assert parse_rate("5/60") == (5, 60.0)
+
+
+def test_memory_bucket_refuses_past_limit():
+    limiter = MemoryRateLimiter()
+
+    async def scenario():
+        assert [await limiter.hit_all([("k", 2, 60)]) for _ in range(2)] == [0.0, 0.0]
+        assert 0 < await limiter.hit_all([("k", 2, 60)]) <= 30
+        assert await limiter.hit_all([("other", 2, 60)]) == 0.0
+
+    run(scenario())
+
+
+def test_redis_window_refuses_past_limit():
+    fakeredis = pytest.importorskip("fakeredis")
+    limiter = RedisRateLimiter(client=fakeredis.aioredis.FakeRedis(decode_responses=True))
+
+    async def scenario():
+        assert [await limiter.hit_all([("k", 2, 60)]) for _ in range(2)] == [0.0, 0.0]
+        assert 0 < await limiter.hit_all([("k", 2, 60)]) <= 60
+
+    run(scenario())
+
+
+def test_dependency_answers_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "limiter", MemoryRateLimiter())
+    monkeypatch.setitem(rate_limit.RULES, "login", rate_limit.RateLimitRule("login", "1/60", "10/60"))
+    check = rate_limit.rate_limit("login")
+
+    run(check(login_request("a@example.com")))
+    with pytest.raises(HTTPException) as excinfo:
+        run(check(login_request("A@example.com ")))
+    assert excinfo.value.status_code == 429
+    assert int(excinfo.value.headers["Retry-After"]) >= 1
+
+
+def email_rejection_keeps_ip_budget(limiter) -> None:
+    async def scenario():
+        ip = ("login:ip:10.0.0.1", 2, 60.0)
+        assert not await limiter.hit_all([ip, ("login:email:a@example.com", 1, 60.0)])
+        # Same IP, same exhausted email: rejected without charging the IP.
+        assert await limiter.hit_all([ip, ("login:email:a@example.com", 1, 60.0)])
+        assert await limiter.hit_all([ip, ("login:email:a@example.com", 1, 60.0)])
+        assert not await limiter.hit_all([ip, ("login:email:b@example.com", 1, 60.0)])
+        assert await limiter.hit_all([ip, ("login:email:c@example.com", 1, 60.0)])
+
+    run(scenario())
+
+
+def test_memory_rejection_charges_no_bucket():
+    email_rejection_keeps_ip_budget(MemoryRateLimiter())
+
+
+def test_redis_rejection_charges_no_bucket():
+    fakeredis = pytest.importorskip("fakeredis")
+    email_rejection_keeps_ip_budget(RedisRateLimiter(client=fakeredis.aioredis.FakeRedis(decode_responses=True)))
+
+
+def test_decisions_exported_on_metrics(client, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    client.post("/auth/login", json={"email": "nobody@example.com", "password": "x" * 8})
+    body = client.get("/metrics").text
+    assert "# TYPE rate_limit_decisions_total counter" in body
+    assert 'rate_limit_decisions_total{outcome="allowed",rule="login"}' in body
@@ -0,0 +1,44 @@
+from tests.helpers import bearer, register_and_login
+
+
+def refresh(client, token: str):
+    return client.post("/auth/refresh", json={"refresh_token": token})
+
+
+def test_refresh_rotates_tokens(client):
+    tokens = register_and_login(client)
+    response = refresh(client, tokens["refresh_token"])
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert client.get("/auth/protected", headers=bearer(rotated["access_token"])).status_code == 200
+
+
+def test_reused_refresh_token_revokes_family(client):
+    tokens = register_and_login(client)
+    rotated = refresh(client, tokens["refresh_token"]).json()
+
+    reuse = refresh(client, tokens["refresh_token"])
+    assert reuse.status_code == 401
+    assert reuse.json()["detail"] == "Refresh token reuse detected"
+    # The legitimate holder's newer token dies with the family.
+    assert refresh(client, rotated["refresh_token"]).status_code == 401
+
+
+def test_logout_revokes_refresh_family(client):
+    tokens = register_and_login(client)
+    assert client.post("/auth/logout", headers=bearer(tokens["access_token"])).status_code == 200
+    assert client.get("/auth/protected", headers=bearer(tokens["access_token"])).status_code == 401
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
+
+
+def test_logout_after_rotation_revokes_family(client):
+    tokens = register_and_login(client)
+    rotated = refresh(client, tokens["refresh_token"]).json()
+    assert client.post("/auth/logout", headers=bearer(rotated["access_token"])).status_code == 200
+    assert refresh(client, rotated["refresh_token"]).status_code == 401
+
+
+def test_refresh_token_is_not_a_bearer_token(client):
+    tokens = register_and_login(client)
+    assert client.get("/auth/protected", headers=bearer(tokens["refresh_token"])).status_code == 401
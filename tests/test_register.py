@@ -0,0 +1,40 @@
+import uuid
+
+import pytest
+
+from app.routes import auth_route
+from tests.helpers import PASSWORD
+
+
+def new_user() -> dict:
+    suffix = uuid.uuid4().hex[:10]
+    return {"email": f"reg_{suffix}@example.com", "username": f"reg_{suffix}", "password": PASSWORD}
+
+
+def register(client, body: dict):
+    return client.post("/auth/register", json=body)
+
+
+@pytest.fixture(params=["pre-check", "unique index"])
+def conflict_path(request, monkeypatch):
+    # "unique index" skips the pre-check, as when a concurrent registration
+    # commits between the check and the insert.
+    if request.param == "unique index":
+        monkeypatch.setattr(auth_route, "_check_available", lambda payload, taken: None)
+    return request.param
+
+
+def test_duplicate_username(client, conflict_path):
+    first = new_user()
+    assert register(client, first).status_code == 201
+    response = register(client, {**new_user(), "username": first["username"]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username already taken"
+
+
+def test_duplicate_email(client, conflict_path):
+    first = new_user()
+    assert register(client, first).status_code == 201
+    response = register(client, {**new_user(), "email": first["email"]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
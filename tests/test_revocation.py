@@ -0,0 +1,149 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, func, select
+
+from app.auth.auth import token_digest
+from app.auth.revocation import RevocationCache, prune_expired_tokens, revoke_token
+from app.models.auth_models import TokenBlacklist
+from app.db.database import SessionLocal
+from tests.conftest import run, with_session
+
+FAR_EXP = (datetime.utcnow() + timedelta(hours=1) - datetime(1970, 1, 1)).total_seconds()
+
+
+@pytest.fixture(autouse=True)
+def clean_blacklist(db_tables):
+    async def wipe(db):
+        await db.execute(delete(TokenBlacklist))
+        await db.commit()
+    run(with_session(wipe))
+
+
+def insert_revocation(digest: str, created_at: datetime, row_id: int | None = None) -> None:
+    async def insert(db):
+        db.add(TokenBlacklist(
+            id=row_id,
+            token_hash=digest,
+            expires_at=datetime.utcnow() + timedelta(hours=1),
+            created_at=created_at,
+        ))
+        await db.commit()
+    run(with_session(insert))
+
+
+def is_revoked(cache: RevocationCache, digest: str) -> bool:
+    return run(with_session(lambda db: cache.is_revoked(digest, FAR_EXP, db)))
+
+
+def sync(cache: RevocationCache) -> None:
+    db = SessionLocal()
+    try:
+        cache.sync(db)
+    finally:
+        db.close()
+
+
+def new_cache(**overrides) -> RevocationCache:
+    options = {"max_size": 100, "refresh_seconds": 3600, "overlap_seconds": 60, "negative_ttl": 0}
+    return RevocationCache(**{**options, **overrides})
+
+
+def test_revocation_committed_out_of_order_is_synced():
+    cache = new_cache()
+    now = datetime.utcnow()
+    insert_revocation("later", now, row_id=10)
+    sync(cache)
+
+    # Created (id and timestamp assigned) before "later" but committed after it.
+    insert_revocation("earlier", now - timedelta(seconds=5), row_id=5)
+    sync(cache)
+
+    assert is_revoked(cache, "earlier")
+    assert cache.stats()["fallbacks"] == 0
+
+
+def test_synced_cache_answers_misses_without_the_table():
+    cache = new_cache()
+    sync(cache)
+    assert not is_revoked(cache, "never-revoked")
+
+    # Revoked on another worker: visible after the next sync, not before.
+    insert_revocation("from-other-worker", datetime.utcnow())
+    assert not is_revoked(cache, "from-other-worker")
+    sync(cache)
+    assert is_revoked(cache, "from-other-worker")
+    assert cache.stats()["fallbacks"] == 0
+
+
+def test_unsynced_cache_falls_back_to_table():
+    cache = new_cache()
+    insert_revocation("from-other-worker", datetime.utcnow())
+
+    assert is_revoked(cache, "from-other-worker")
+    assert not is_revoked(cache, "never-revoked")
+    assert cache.stats()["fallbacks"] == 2
+
+
+def test_stale_cache_falls_back_to_table():
+    cache = new_cache(refresh_seconds=0.01)
+    sync(cache)
+    insert_revocation("late", datetime.utcnow())
+
+    time.sleep(RevocationCache.STALE_AFTER_SYNCS * 0.01)
+    assert is_revoked(cache, "late")
+
+
+def test_overflowed_cache_falls_back_to_table():
+    cache = new_cache(max_size=1)
+    insert_revocation("first", datetime.utcnow())
+    insert_revocation("second", datetime.utcnow())
+    sync(cache)
+
+    assert not cache.stats()["authoritative"]
+    assert is_revoked(cache, "first")
+    assert is_revoked(cache, "second")
+
+
+def test_negative_answer_expires_while_falling_back():
+    cache = new_cache(negative_ttl=0.05)
+    assert not is_revoked(cache, "late")
+    insert_revocation("late", datetime.utcnow())
+    assert not is_revoked(cache, "late")
+
+    time.sleep(0.1)
+    assert is_revoked(cache, "late")
+
+
+def test_revoking_the_same_token_twice_is_a_no_op():
+    async def revoke_twice(db):
+        await revoke_token("dup", FAR_EXP, db)
+        await revoke_token("dup", FAR_EXP, db)
+        return (await db.execute(select(func.count()).select_from(TokenBlacklist))).scalar()
+
+    assert run(with_session(revoke_twice)) == 1
+
+
+def test_local_revocation_is_a_hit():
+    cache = RevocationCache(max_size=10, refresh_seconds=3600, overlap_seconds=60, negative_ttl=0)
+    cache.add("local", FAR_EXP)
+
+    assert is_revoked(cache, "local")
+    assert cache.stats()["hits"] == 1
+
+
+def test_digest_prefers_jti():
+    assert token_digest("a.b.c", {"jti": "abc"}) == token_digest("x.y.z", {"jti": "abc"})
+    assert token_digest("a.b.c", {}) != token_digest("x.y.z", {})
+
+
+def test_prune_deletes_only_expired_rows(db):
+    for digest, expires_at in [("live", datetime.utcnow() + timedelta(hours=1))] + [
+        (f"dead-{i}", datetime.utcnow() - timedelta(minutes=1)) for i in range(5)
+    ]:
+        db.add(TokenBlacklist(token_hash=digest, expires_at=expires_at))
+    db.commit()
+
+    assert prune_expired_tokens(db, batch_size=2) == 5
+    assert [row.token_hash for row in db.query(TokenBlacklist)] == ["live"]
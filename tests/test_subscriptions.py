@@ -0,0 +1,91 @@
+from sqlalchemy import select, update
+
+from app.models.subscription_models import SubscriptionPlan
+from app.utils.plan_catalog import PlanCatalog, plan_catalog
+from tests.conftest import run, with_session
+from tests.helpers import bearer, register_and_login
+
+
+def set_plan(plan_id: int, **values) -> None:
+    async def apply(db):
+        await db.execute(update(SubscriptionPlan).where(SubscriptionPlan.id == plan_id).values(**values))
+        await db.commit()
+    run(with_session(apply))
+
+
+def first_plan_id() -> int:
+    async def fetch(db):
+        return await db.scalar(select(SubscriptionPlan.id).order_by(SubscriptionPlan.id))
+    return run(with_session(fetch))
+
+
+def subscribe(client, token: str, plan_id: int):
+    return client.post("/subscriptions/subscribe", json={"plan_id": plan_id}, headers=bearer(token))
+
+
+def test_subscribe_rejects_plan_deactivated_after_catalog_load(client):
+    token = register_and_login(client)["access_token"]
+    plan_id = first_plan_id()
+    assert client.get("/subscriptions/plans").status_code == 200
+    assert plan_id in plan_catalog.plans
+
+    set_plan(plan_id, is_active=False)
+    try:
+        assert subscribe(client, token, plan_id).status_code == 404
+    finally:
+        set_plan(plan_id, is_active=True)
+    assert subscribe(client, token, plan_id).status_code == 200
+
+
+def test_subscribe_charges_current_price(client):
+    token = register_and_login(client)["access_token"]
+    plan_id = first_plan_id()
+    assert client.get("/subscriptions/plans").status_code == 200
+    original = plan_catalog.plans[plan_id].price
+
+    set_plan(plan_id, price=original + 10)
+    try:
+        response = subscribe(client, token, plan_id)
+    finally:
+        set_plan(plan_id, price=original)
+    assert response.status_code == 200
+    assert response.json()["plan"]["price"] == original + 10
+
+
+def add_plan(db, name: str, **values) -> SubscriptionPlan:
+    plan = SubscriptionPlan(name=name, price=values.pop("price", 9.99), duration_days=30, **values)
+    db.add(plan)
+    db.commit()
+    return plan
+
+
+def test_catalog_serves_active_plans_with_etag(db):
+    add_plan(db, "Basic")
+    add_plan(db, "Retired", is_active=False)
+    catalog = PlanCatalog(ttl=60)
+    catalog.load(db)
+
+    assert [plan.name for plan in catalog.plans.values()] == ["Basic"]
+    assert b'"Basic"' in catalog.body and b"Retired" not in catalog.body
+    assert catalog.matches(catalog.etag)
+    assert catalog.matches(f'"other", W/{catalog.etag}')
+    assert catalog.matches("*")
+    assert not catalog.matches('"other"')
+    assert not catalog.matches(None)
+
+
+def test_catalog_reloads_after_ttl(db):
+    add_plan(db, "Basic")
+    catalog = PlanCatalog(ttl=60)
+    catalog.load(db)
+    etag = catalog.etag
+
+    add_plan(db, "Pro", price=19.99)
+    assert not catalog.stale
+    assert len(catalog.plans) == 1
+
+    catalog.ttl = 0
+    assert catalog.stale
+    catalog.load(db)
+    assert len(catalog.plans) == 2
+    assert catalog.etag != etag